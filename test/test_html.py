@@ -0,0 +1,175 @@
+import sys
+import unittest
+
+
+sys.path.append('../')
+
+
+try:
+    import markupsafe
+except ImportError:
+    markupsafe = None
+
+
+def import_html(with_markupsafe):
+    """ Import a fresh copy of ``unstdlib.html``, with or without MarkupSafe
+    being importable.
+    """
+    saved_html = sys.modules.pop('unstdlib.html', None)
+    saved_markupsafe = sys.modules.get('markupsafe')
+    if not with_markupsafe:
+        sys.modules['markupsafe'] = None  # Makes the import fail.
+    try:
+        return __import__('unstdlib.html', fromlist=['html'])
+    finally:
+        if saved_html is not None:
+            sys.modules['unstdlib.html'] = saved_html
+            sys.modules['unstdlib'].html = saved_html
+        if saved_markupsafe is not None:
+            sys.modules['markupsafe'] = saved_markupsafe
+        else:
+            sys.modules.pop('markupsafe', None)
+
+
+class HtmlTestCase(object):
+    """ Mixin which imports ``unstdlib.html`` with or without MarkupSafe,
+    depending on ``with_markupsafe``.
+    """
+    with_markupsafe = None
+
+    def setUp(self):
+        self.html = import_html(self.with_markupsafe)
+
+
+class HtmlTests(HtmlTestCase):
+
+    def test_literal_type(self):
+        is_markup = markupsafe is not None and issubclass(self.html.literal, markupsafe.Markup)
+        self.assertEqual(is_markup, self.with_markupsafe)
+
+    def test_tag_nested_literal(self):
+        html = self.html
+        self.assertEqual(html.tag('td', html.tag('b', 'x')), '<td><b>x</b></td>')
+        self.assertEqual(html.tag('td', html.literal('<b>x</b>')), '<td><b>x</b></td>')
+
+    def test_tag_template_nested_literal(self):
+        html = self.html
+        td = html.tag_template('td', {'class': 'c'})
+        self.assertEqual(td(html.tag('b', 'x')), '<td class="c"><b>x</b></td>')
+        self.assertEqual(td(html.literal('<b>x</b>')), '<td class="c"><b>x</b></td>')
+        self.assertEqual(td([html.literal('<i>'), 'y', html.literal('</i>')]), '<td class="c"><i>y</i></td>')
+
+    def test_tag_builder_nested(self):
+        ul, li = self.html.tag_builder(['ul', 'li'])
+        self.assertEqual(ul(li('a')), '<ul><li>a</li></ul>')
+        self.assertEqual(ul(li(ch) for ch in 'ab'), '<ul><li>a</li><li>b</li></ul>')
+
+
+class TestHtml(HtmlTests, unittest.TestCase):
+    with_markupsafe = False
+
+
+@unittest.skipIf(markupsafe is None, "markupsafe is not installed")
+class TestHtmlMarkupSafe(HtmlTests, unittest.TestCase):
+    with_markupsafe = True
+
+
+class LazyTagTests(HtmlTestCase):
+
+    def test_nested_literal(self):
+        html = self.html
+        doc = html.lazy_tag('ul', [html.tag('li', 'a'), html.lazy_tag('li', html.literal('<b>b</b>'))])
+        self.assertEqual(doc.render(), '<ul><li>a</li><li><b>b</b></li></ul>')
+
+    def test_chunks(self):
+        html = self.html
+        doc = html.lazy_tag('ul', (html.lazy_tag('li', str(i)) for i in range(2)), {'id': 'x'})
+        self.assertEqual(list(doc), ['<ul id="x">', '<li>', '0', '</li>', '<li>', '1', '</li>', '</ul>'])
+
+    def test_self_closed(self):
+        html = self.html
+        self.assertEqual(html.lazy_tag('p', [html.lazy_tag('br', None), 'x']).render(), '<p><br />x</p>')
+
+    def test_matches_tag(self):
+        html = self.html
+        doc = html.lazy_tag('table', [html.lazy_tag('tr', [html.lazy_tag('td', 'a', {'class': 'c'})])])
+        expected = html.tag('table', [html.tag('tr', [html.tag('td', 'a', {'class': 'c'})])])
+        self.assertEqual(doc.render(), expected)
+        self.assertEqual(str(doc), expected)
+
+    def test_write_to(self):
+        chunks = []
+
+        class Writer(object):
+            write = chunks.append
+
+        self.html.lazy_tag('div', 'x').write_to(Writer())
+        self.assertEqual(chunks, ['<div>', 'x', '</div>'])
+
+    def test_deep_nesting(self):
+        doc = 'leaf'
+        for i in range(sys.getrecursionlimit() * 2):
+            doc = self.html.lazy_tag('b', doc)
+        self.assertTrue(doc.render().startswith('<b><b>'))
+
+    def test_tag_builder_stream(self):
+        ul, li = self.html.tag_builder(['ul', 'li'], stream=True)
+        doc = ul(li(ch) for ch in 'ab')
+        self.assertTrue(isinstance(doc, self.html.lazy_tag))
+        self.assertEqual(doc.render(), '<ul><li>a</li><li>b</li></ul>')
+
+
+class TestLazyTag(LazyTagTests, unittest.TestCase):
+    with_markupsafe = False
+
+
+@unittest.skipIf(markupsafe is None, "markupsafe is not installed")
+class TestLazyTagMarkupSafe(LazyTagTests, unittest.TestCase):
+    with_markupsafe = True
+
+
+class EscapeTests(HtmlTestCase):
+
+    def test_escape(self):
+        html = self.html
+        self.assertEqual(html.escape('<a href="x">Tom & Jerry\'s</a>'),
+                         '&lt;a href=&#34;x&#34;&gt;Tom &amp; Jerry&#39;s&lt;/a&gt;')
+        self.assertEqual(html.escape('plain'), 'plain')
+        self.assertEqual(html.escape(42), '42')
+        self.assertTrue(isinstance(html.escape('x'), html.literal))
+
+    def test_escape_markup(self):
+        html = self.html
+        self.assertEqual(html.escape(html.literal('<br />')), '<br />')
+        self.assertEqual(html.escape(html.tag('b', 'x')), '<b>x</b>')
+
+    def test_escaped_attrs(self):
+        html = self.html
+        expected = '<td title="&#34;a&#34; &amp; &lt;b&gt;">x</td>'
+        self.assertEqual(html.tag('td', 'x', {'title': '"a" & <b>'}), expected)
+        td = html.tag_template('td', {'title': '"a" & <b>'})
+        self.assertEqual(td('x'), expected)
+        self.assertEqual(html.tag_template('td')('x', {'title': '"a" & <b>'}), expected)
+
+    def test_attr_values(self):
+        html = self.html
+        self.assertEqual(html.tag('td', 'x', {'colspan': 2}), '<td colspan="2">x</td>')
+        self.assertEqual(html.tag('a', 'x', {'href': html.literal('?a=1&amp;b=2')}), '<a href="?a=1&amp;b=2">x</a>')
+
+    def test_bare_attrs(self):
+        html = self.html
+        self.assertEqual(html.tag('input', None, ['checked']), '<input checked />')
+        self.assertEqual(html.tag('input', None, [('checked', True), ('value', None)]), '<input checked />')
+
+
+class TestEscape(EscapeTests, unittest.TestCase):
+    with_markupsafe = False
+
+
+@unittest.skipIf(markupsafe is None, "markupsafe is not installed")
+class TestEscapeMarkupSafe(EscapeTests, unittest.TestCase):
+    with_markupsafe = True
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,272 @@
+import os
+import sys
+import shutil
+import tempfile
+import threading
+import unittest
+
+
+sys.path.append('../')
+
+
+try:
+    import sqlalchemy
+except ImportError:
+    sqlalchemy = None
+
+if sqlalchemy is not None:
+    from sqlalchemy import Column, Integer, String, create_engine, event
+    from sqlalchemy.orm import sessionmaker
+    try:
+        from sqlalchemy.orm import declarative_base
+    except ImportError:
+        from sqlalchemy.ext.declarative import declarative_base
+
+    from unstdlib.sqlalchemy import enumerate_query_by_limit, enumerate_query_streaming, bulk_insert
+
+    Base = declarative_base()
+
+    class Thing(Base):
+        __tablename__ = 'thing'
+
+        id = Column(Integer, primary_key=True)
+        group = Column(Integer, nullable=False)
+        name = Column(String(32), nullable=False)
+        note = Column(String(32))
+
+
+@unittest.skipIf(sqlalchemy is None, "sqlalchemy is not installed")
+class TestEnumerateQueryByLimit(unittest.TestCase):
+
+    def setUp(self):
+        self.engine = create_engine('sqlite://')
+        Base.metadata.create_all(self.engine)
+        self.session = sessionmaker(bind=self.engine)()
+        # Insert out of id order, with several rows per group.
+        self.session.add_all(
+            Thing(id=i, group=i % 7, name='thing%d' % i)
+            for i in reversed(range(1, 101))
+        )
+        self.session.commit()
+
+        self.statements = []
+        event.listen(self.engine, 'before_cursor_execute', self._record)
+
+    def tearDown(self):
+        event.remove(self.engine, 'before_cursor_execute', self._record)
+        self.session.close()
+
+    def _record(self, conn, cursor, statement, *args):
+        self.statements.append(statement)
+
+    def test_offset(self):
+        q = self.session.query(Thing).order_by(Thing.id)
+        ids = [t.id for t in enumerate_query_by_limit(q, limit=30)]
+        self.assertEqual(ids, list(range(1, 101)))
+        self.assertEqual(len(self.statements), 4)
+
+    def test_keyset(self):
+        q = self.session.query(Thing).order_by(Thing.name)
+        ids = [t.id for t in enumerate_query_by_limit(q, limit=30, key=Thing.id)]
+        self.assertEqual(ids, list(range(1, 101)))
+        self.assertEqual(len(self.statements), 4)
+        for statement in self.statements[1:]:
+            self.assertTrue('thing.id > ?' in statement)
+
+    def test_keyset_exact_multiple(self):
+        q = self.session.query(Thing)
+        ids = [t.id for t in enumerate_query_by_limit(q, limit=25, key=Thing.id)]
+        self.assertEqual(ids, list(range(1, 101)))
+
+    def test_keyset_composite(self):
+        q = self.session.query(Thing).filter(Thing.id > 10)
+        key = (Thing.group, Thing.id)
+        rows = [(t.group, t.id) for t in enumerate_query_by_limit(q, limit=6, key=key)]
+        self.assertEqual(rows, sorted((i % 7, i) for i in range(11, 101)))
+
+    def test_keyset_columns(self):
+        q = self.session.query(Thing.id, Thing.name)
+        rows = list(enumerate_query_by_limit(q, limit=40, key=Thing.id))
+        self.assertEqual([r.id for r in rows], list(range(1, 101)))
+
+
+@unittest.skipIf(sqlalchemy is None, "sqlalchemy is not installed")
+class TestEnumerateQueryPrefetch(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.engine = create_engine('sqlite:///' + os.path.join(self.tmpdir, 'test.db'))
+        Base.metadata.create_all(self.engine)
+        self.session = sessionmaker(bind=self.engine)()
+        self.session.add_all(
+            Thing(id=i, group=i % 7, name='thing%d' % i)
+            for i in range(1, 101)
+        )
+        self.session.commit()
+
+    def tearDown(self):
+        self.session.close()
+        self.engine.dispose()
+        shutil.rmtree(self.tmpdir)
+
+    def test_prefetch(self):
+        q = self.session.query(Thing).order_by(Thing.id)
+        ids = [t.id for t in enumerate_query_by_limit(q, limit=30, prefetch=2)]
+        self.assertEqual(ids, list(range(1, 101)))
+
+    def test_prefetch_detached(self):
+        q = self.session.query(Thing).order_by(Thing.id)
+        n = 0
+        for t in enumerate_query_by_limit(q, limit=10, prefetch=1):
+            # Checked while the fetching thread is still running.
+            self.assertTrue(sqlalchemy.inspect(t).detached)
+            n += 1
+        self.assertEqual(n, 100)
+
+    def test_prefetch_keyset(self):
+        q = self.session.query(Thing.id, Thing.name)
+        rows = list(enumerate_query_by_limit(q, limit=30, key=Thing.id, prefetch=1))
+        self.assertEqual([r.name for r in rows], ['thing%d' % i for i in range(1, 101)])
+
+    def test_prefetch_stop_early(self):
+        num_threads = threading.active_count()
+        q = self.session.query(Thing).order_by(Thing.id)
+        it = enumerate_query_by_limit(q, limit=10, prefetch=1)
+        for t in it:
+            if t.id == 15:
+                break
+        self.assertEqual(t.id, 15)
+        it.close()
+        self.assertEqual(threading.active_count(), num_threads)
+
+    def test_prefetch_error(self):
+        q = self.session.query(Thing).filter(sqlalchemy.text('nonexistent = 1'))
+        it = enumerate_query_by_limit(q, limit=10, prefetch=1)
+        self.assertRaises(sqlalchemy.exc.OperationalError, list, it)
+
+
+@unittest.skipIf(sqlalchemy is None, "sqlalchemy is not installed")
+class TestEnumerateQueryStreaming(unittest.TestCase):
+
+    def setUp(self):
+        self.engine = create_engine('sqlite://')
+        Base.metadata.create_all(self.engine)
+        self.session = sessionmaker(bind=self.engine)()
+        self.session.add_all(
+            Thing(id=i, group=i % 7, name='thing%d' % i)
+            for i in range(1, 101)
+        )
+        self.session.commit()
+
+    def tearDown(self):
+        self.session.close()
+
+    def test_streaming(self):
+        q = self.session.query(Thing).order_by(Thing.id)
+        ids = []
+        for t in enumerate_query_streaming(q, batch_size=30):
+            ids.append(t.id)
+            self.assertTrue(len(self.session.identity_map) <= 30)
+        self.assertEqual(ids, list(range(1, 101)))
+        self.assertEqual(len(self.session.identity_map), 0)
+
+    def test_streaming_keeps_modified(self):
+        q = self.session.query(Thing).order_by(Thing.id)
+        for t in enumerate_query_streaming(q, batch_size=30):
+            if t.id == 5:
+                t.name = 'changed'
+        self.assertEqual(len(self.session.identity_map), 1)
+        self.session.commit()
+        self.assertEqual(self.session.query(Thing).filter_by(id=5).one().name, 'changed')
+
+    def test_streaming_keeps_preloaded(self):
+        mine = self.session.query(Thing).filter_by(id=3).one()
+        q = self.session.query(Thing).order_by(Thing.id)
+        self.assertEqual(len(list(enumerate_query_streaming(q, batch_size=30))), 100)
+        self.assertFalse(sqlalchemy.inspect(mine).detached)
+        mine.name = 'changed'
+        self.session.commit()
+        self.assertEqual(self.session.query(Thing).filter_by(id=3).one().name, 'changed')
+
+    def test_streaming_rows(self):
+        q = self.session.query(Thing, Thing.name).order_by(Thing.id)
+        rows = list(enumerate_query_streaming(q, batch_size=40))
+        self.assertEqual([r.name for r in rows], ['thing%d' % i for i in range(1, 101)])
+        self.assertEqual(len(self.session.identity_map), 0)
+
+
+@unittest.skipIf(sqlalchemy is None, "sqlalchemy is not installed")
+class TestBulkInsert(unittest.TestCase):
+
+    def setUp(self):
+        self.engine = create_engine('sqlite://')
+        Base.metadata.create_all(self.engine)
+        self.session = sessionmaker(bind=self.engine)()
+
+    def tearDown(self):
+        self.session.close()
+
+    def _rows(self, ids, name='thing%d'):
+        return (dict(id=i, group=i % 7, name=name % i) for i in ids)
+
+    def _names(self):
+        return [t.name for t in self.session.query(Thing).order_by(Thing.id)]
+
+    def test_insert(self):
+        n = bulk_insert(self.session, Thing, self._rows(range(1, 101)), batch_size=30)
+        self.session.commit()
+        self.assertEqual(n, 100)
+        self.assertEqual(self._names(), ['thing%d' % i for i in range(1, 101)])
+
+    def test_insert_table_connection(self):
+        with self.engine.connect() as conn:
+            bulk_insert(conn, Thing.__table__, self._rows(range(1, 11)), batch_size=3, commit=True)
+        self.assertEqual(len(self._names()), 10)
+
+    def test_commit(self):
+        bulk_insert(self.session, Thing, self._rows(range(1, 11)), batch_size=3, commit=True)
+        self.session.rollback()
+        self.assertEqual(len(self._names()), 10)
+
+    def test_on_conflict_ignore(self):
+        bulk_insert(self.session, Thing, self._rows(range(1, 11)))
+        n = bulk_insert(self.session, Thing, self._rows(range(5, 21), 'new%d'), on_conflict='ignore')
+        self.assertEqual(n, 16)
+        names = self._names()
+        self.assertEqual(names[:10], ['thing%d' % i for i in range(1, 11)])
+        self.assertEqual(names[10:], ['new%d' % i for i in range(11, 21)])
+
+    def test_on_conflict_update(self):
+        bulk_insert(self.session, Thing, self._rows(range(1, 11)))
+        bulk_insert(self.session, Thing, self._rows(range(5, 21), 'new%d'), batch_size=4,
+                    on_conflict='update', conflict_columns=[Thing.id])
+        names = self._names()
+        self.assertEqual(names[:4], ['thing%d' % i for i in range(1, 5)])
+        self.assertEqual(names[4:], ['new%d' % i for i in range(5, 21)])
+
+    def test_mixed_keys(self):
+        rows = [
+            dict(id=1, group=1, name='a'),
+            dict(id=2, group=2, name='b', note='x'),
+            dict(id=3, group=3, name='c'),
+            dict(note='y', name='d', group=4, id=4),
+        ]
+        n = bulk_insert(self.session, Thing, rows, batch_size=10)
+        self.assertEqual(n, 4)
+        notes = [t.note for t in self.session.query(Thing).order_by(Thing.id)]
+        self.assertEqual(notes, [None, 'x', None, 'y'])
+
+    def test_mixed_keys_update(self):
+        bulk_insert(self.session, Thing, self._rows(range(1, 4)))
+        rows = [dict(id=1, group=0, name='new1'), dict(id=2, group=0, name='new2', note='x')]
+        bulk_insert(self.session, Thing, rows, on_conflict='update')
+        things = self.session.query(Thing).order_by(Thing.id).all()
+        self.assertEqual([t.name for t in things], ['new1', 'new2', 'thing3'])
+        self.assertEqual([t.note for t in things], [None, 'x', None])
+
+    def test_on_conflict_invalid(self):
+        self.assertRaises(ValueError, bulk_insert, self.session, Thing, self._rows([1]), on_conflict='replace')
+
+
+if __name__ == '__main__':
+    unittest.main()
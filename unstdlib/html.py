@@ -1,49 +1,98 @@
 import os.path
+import json
 import hashlib
 import time
 import functools
+import itertools
+from multiprocessing.pool import ThreadPool
 
 from unstdlib.six import text_type, string_types
 from unstdlib.standard.functools_ import memoized
+from unstdlib.standard.contextlib_ import open_atomic
 from unstdlib.standard.list_ import iterate_items, iterate
 
 try:
     import markupsafe
     MarkupType = markupsafe.Markup
+    _escape_text = markupsafe.escape
 except ImportError:
     MarkupType = text_type
+    _escape_text = None
 
 
 
 __all__ = [
-    'get_cache_buster', 'literal', 'tag', 'tag_builder',
-    'javascript_link', 'stylesheet_link',
+    'get_cache_buster', 'build_cache_buster_manifest',
+    'load_cache_buster_manifest', 'literal', 'escape', 'tag', 'tag_template',
+    'lazy_tag', 'tag_builder', 'javascript_link', 'stylesheet_link',
 ]
 
 
-@memoized
-def _cache_key_by_md5(src_path, chunk_size=65536):
-    hash = hashlib.md5()
+_HASH_METHODS = {
+    'md5': hashlib.md5,
+}
+if hasattr(hashlib, 'blake2b'):
+    _HASH_METHODS['blake2b'] = functools.partial(hashlib.blake2b, digest_size=16)
+
+# Cache of ``(src_path, method) -> ((mtime, size, inode), hexdigest)``
+_FILE_DIGESTS = {}
+
+
+def _hash_file(src_path, method='md5', chunk_size=65536):
+    new_hash = _HASH_METHODS[method]
     with open(src_path, 'rb') as f:
-        for chunk in iter(lambda: f.read(65536), ''):
-            if len(chunk) == 0:
-                break
+        if hasattr(hashlib, 'file_digest'):
+            return hashlib.file_digest(f, new_hash).hexdigest()
+
+        hash = new_hash()
+        for chunk in iter(lambda: f.read(chunk_size), b''):
             hash.update(chunk)
     return hash.hexdigest()
 
 
+def _cache_key_by_hash(src_path, method='md5', chunk_size=65536):
+    st = os.stat(src_path)
+    stat_key = st.st_mtime, st.st_size, st.st_ino
+
+    cached = _FILE_DIGESTS.get((src_path, method))
+    if cached and cached[0] == stat_key:
+        return cached[1]
+
+    digest = _hash_file(src_path, method, chunk_size)
+    _FILE_DIGESTS[(src_path, method)] = stat_key, digest
+    return digest
+
+
+def _cache_key_by_md5(src_path, chunk_size=65536):
+    return _cache_key_by_hash(src_path, 'md5', chunk_size)
+
+
 @memoized
 def _cache_key_by_mtime(src_path):
     return str(int(os.path.getmtime(src_path)))
 
 
+# Cache of ``abspath(src_path) -> cache key``, see ``load_cache_buster_manifest``.
+_MANIFEST = {}
+
+
+def _cache_key_by_manifest(src_path):
+    try:
+        return _MANIFEST[os.path.abspath(src_path)]
+    except KeyError:
+        raise KeyError('Path is not in a loaded manifest: %s' % src_path)
+
+
 _IMPORT_TIME = str(int(time.time()))
 
 _BUST_METHODS = {
     'mtime': _cache_key_by_mtime,
     'md5': _cache_key_by_md5,
     'importtime': lambda src_path: _IMPORT_TIME,
+    'manifest': _cache_key_by_manifest,
 }
+if 'blake2b' in _HASH_METHODS:
+    _BUST_METHODS['blake2b'] = functools.partial(_cache_key_by_hash, method='blake2b')
 
 
 def get_cache_buster(src_path, method='importtime'):
@@ -54,11 +103,14 @@ def get_cache_buster(src_path, method='importtime'):
         Filesystem path to the file we're generating a cache-busting value for.
 
     :param method:
-        Method for cache-busting. Supported values: importtime, mtime, md5
-        The default is 'importtime', because it requires the least processing.
+        Method for cache-busting. Supported values: importtime, mtime, md5,
+        blake2b (where available), manifest. The default is 'importtime',
+        because it requires the least processing. The manifest method
+        answers from memory, see ``load_cache_buster_manifest``.
 
-    Note that the mtime and md5 cache busting methods' results are cached on
-    the src_path.
+    Note that the mtime cache busting method's results are cached on the
+    src_path. The md5 and blake2b content hashes are cached until the file's
+    mtime, size or inode changes.
 
     Example::
 
@@ -78,11 +130,92 @@ def get_cache_buster(src_path, method='importtime'):
     return fn(src_path)
 
 
+def build_cache_buster_manifest(static_dir, manifest_path=None, method='md5', num_threads=8):
+    """ Hash every file under ``static_dir`` ahead of time, and return a dict
+    of paths relative to ``static_dir`` to their cache-busting values.
+
+    :param manifest_path:
+        Optional path to atomically write the manifest to, as JSON. The
+        manifest file itself is skipped if it is inside ``static_dir``.
+
+    :param method:
+        Content hash to use: md5 or blake2b (where available).
+
+    :param num_threads:
+        Number of files to hash in parallel.
+
+    Example::
+
+        >>> import tempfile
+        >>> SRC_DIR = os.path.dirname(__file__)
+        >>> manifest_path = os.path.join(tempfile.mkdtemp(), 'manifest.json')
+        >>> manifest = build_cache_buster_manifest(SRC_DIR, manifest_path)
+        >>> manifest['html.py'] == _cache_key_by_md5(os.path.join(SRC_DIR, 'html.py'))
+        True
+    """
+    skip_path = manifest_path and os.path.abspath(manifest_path)
+    paths = []
+    for root, dirs, files in os.walk(static_dir):
+        for name in files:
+            path = os.path.join(root, name)
+            if os.path.abspath(path) != skip_path:
+                paths.append(path)
+
+    pool = ThreadPool(num_threads)
+    try:
+        digests = pool.map(lambda path: _hash_file(path, method), paths)
+    finally:
+        pool.close()
+        pool.join()
+
+    manifest = dict(
+        (os.path.relpath(path, static_dir).replace(os.sep, '/'), digest)
+        for path, digest in zip(paths, digests)
+    )
+
+    if manifest_path:
+        with open_atomic(manifest_path) as f:
+            json.dump(manifest, f, indent=0, sort_keys=True)
+
+    return manifest
+
+
+def load_cache_buster_manifest(manifest_path, static_dir=None):
+    """ Load a manifest written by ``build_cache_buster_manifest`` into
+    memory, so that ``get_cache_buster(src_path, method='manifest')`` can
+    answer without touching the filesystem.
+
+    :param static_dir:
+        Directory the manifest's paths are relative to. Defaults to the
+        directory containing the manifest.
+
+    Example::
+
+        >>> import tempfile
+        >>> SRC_DIR = os.path.dirname(__file__)
+        >>> manifest_path = os.path.join(tempfile.mkdtemp(), 'manifest.json')
+        >>> manifest = build_cache_buster_manifest(SRC_DIR, manifest_path)
+        >>> load_cache_buster_manifest(manifest_path, SRC_DIR)
+        >>> get_cache_buster(os.path.join(SRC_DIR, 'html.py'), method='manifest') == manifest['html.py']
+        True
+    """
+    if static_dir is None:
+        static_dir = os.path.dirname(manifest_path)
+
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+
+    _MANIFEST.update(
+        (os.path.abspath(os.path.join(static_dir, path)), key)
+        for path, key in iterate_items(manifest)
+    )
+
+
 def _generate_dom_attrs(attrs, allow_no_value=True):
     """ Yield compiled DOM attribute key-value strings.
 
     If the value is `True`, then it is treated as no-value. If `None`, then it
-    is skipped.
+    is skipped. Values are escaped unless they are already markup.
     """
     for attr in iterate_items(attrs):
         if isinstance(attr, string_types):
@@ -93,9 +226,19 @@ def _generate_dom_attrs(attrs, allow_no_value=True):
         if value is True and not allow_no_value:
             value = key  # E.g. <option checked="true" />
         if value is True:
-            yield True  # E.g. <option checked />
+            yield key  # E.g. <option checked />
+        elif hasattr(value, '__html__'):
+            yield '%s="%s"' % (key, value.__html__())
         else:
-            yield '%s="%s"' % (key, value.replace('"', '\\"'))
+            yield '%s="%s"' % (key, _escape_text(value))
+
+
+if _escape_text is None:
+    def _escape_text(s):
+        # Chained str.replace beats str.translate and re.sub for the common
+        # case of short values with nothing to escape.
+        return text_type(s).replace('&', '&amp;').replace('<', '&lt;') \
+            .replace('>', '&gt;').replace('"', '&#34;').replace("'", '&#39;')
 
 
 class literal(MarkupType):
@@ -107,11 +250,34 @@ class literal(MarkupType):
         return self
 
 
+def escape(s):
+    """ Escape ``s`` for use in HTML content or attribute values, and return
+    it as a ``literal``. Objects which are already markup (they have an
+    ``__html__`` method, like ``literal``) are returned as-is. Uses
+    `MarkupSafe`'s speedups if available.
+
+    Example::
+
+        >>> print(escape('<a href="/">Tom & Jerry</a>'))
+        &lt;a href=&#34;/&#34;&gt;Tom &amp; Jerry&lt;/a&gt;
+        >>> print(escape("it's"))
+        it&#39;s
+        >>> print(escape(literal('<br />')))
+        <br />
+        >>> print(escape(42))
+        42
+    """
+    if hasattr(s, '__html__'):
+        return literal(s.__html__())
+    return literal(_escape_text(s))
+
+
 def tag(tagname, content='', attrs=None):
     """ Helper for programmatically building HTML tags.
 
-    Note that this barely does any escaping, and will happily spit out
-    dangerous user input if used as such.
+    Attribute values are escaped, but content is not: it will happily spit
+    out dangerous user input if used as such. Wrap untrusted content with
+    ``escape``.
 
     :param tagname:
         Tag name of the DOM element we want to return.
@@ -133,35 +299,168 @@ def tag(tagname, content='', attrs=None):
         >>> tag('script', attrs=[('src', '/static/js/core.js'), ('type', 'text/javascript')])
         u'<script src="/static/js/core.js" type="text/javascript"></script>'
         >>> tag('meta', content=None, attrs=dict(content='"quotedquotes"'))
-        u'<meta content="\\\\"quotedquotes\\\\"" />'
+        u'<meta content="&#34;quotedquotes&#34;" />'
+        >>> tag('input', content=None, attrs=['checked'])
+        u'<input checked />'
         >>> tag('ul', (tag('li', str(i)) for i in xrange(3)))
         u'<ul><li>0</li><li>1</li><li>2</li></ul>'
     """
+    open_tag = _open_tag(tagname, attrs)
+    if content is None:
+        return literal(open_tag + ' />')
+
+    if not isinstance(content, string_types):
+        content = ''.join(iterate(content, unless=string_types + (literal,)))
+    return literal('%s>%s</%s>' % (open_tag, content, tagname))
+
+
+def _open_tag(tagname, attrs=None):
+    """ Return the unterminated opening tag, e.g. ``<div class="foo"``. """
     attrs_str = attrs and ' '.join(_generate_dom_attrs(attrs))
-    open_tag = tagname
     if attrs_str:
-        open_tag += ' ' + attrs_str
+        return '<%s %s' % (tagname, attrs_str)
+    return '<' + tagname
 
-    if content is None:
-        return literal('<%s />' % open_tag)
 
-    content = ''.join(iterate(content, unless=string_types + (literal,)))
-    return literal('<%s>%s</%s>' % (open_tag, content, tagname))
+class tag_template(object):
+    """ Precompiled version of ``tag`` for a tag name with fixed attributes.
+
+    The opening and closing tags are built once, so each call only
+    interpolates the content and any extra attributes. Useful when rendering
+    the same element many times, like the cells of a large table.
+
+    :param tagname:
+        Tag name of the DOM element we want to return.
+
+    :param attrs:
+        Optional dictionary-like collection of attributes which are included
+        in every rendered element.
+
+    Example::
+
+        >>> td = tag_template('td', {'class': 'cell'})
+        >>> print(td('Hello, world.'))
+        <td class="cell">Hello, world.</td>
+        >>> print(td(str(i) for i in range(3)))
+        <td class="cell">012</td>
+        >>> print(td('foo', attrs={'id': 'bar'}))
+        <td class="cell" id="bar">foo</td>
+        >>> print(tag_template('br')(None))
+        <br />
+    """
+    __slots__ = ('tagname', '_open_tag', '_close_tag')
+
+    def __init__(self, tagname, attrs=None):
+        self.tagname = tagname
+        self._open_tag = _open_tag(tagname, attrs)
+        self._close_tag = '</%s>' % tagname
+
+    def __call__(self, content='', attrs=None):
+        open_tag = self._open_tag
+        if attrs:
+            attrs_str = ' '.join(_generate_dom_attrs(attrs))
+            if attrs_str:
+                open_tag += ' ' + attrs_str
+
+        if content is None:
+            return literal(open_tag + ' />')
+
+        if not isinstance(content, string_types):
+            content = ''.join(iterate(content, unless=string_types + (literal,)))
+        return literal('%s>%s%s' % (open_tag, content, self._close_tag))
+
+    def __repr__(self):
+        return '%s(%r)' % (self.__class__.__name__, self.tagname)
+
+
+class lazy_tag(object):
+    """ Streaming version of ``tag``, which renders nothing until it's
+    iterated over or written out.
+
+    Content can be strings, other ``lazy_tag`` fragments, or an iterable
+    (like a generator) of either. Nested fragments are walked with an explicit
+    stack rather than being joined at each level, so markup is only produced
+    once and deep documents don't recurse. When the content is generated
+    lazily, peak memory is bounded by the largest leaf rather than the whole
+    page.
+
+    Iterating yields the markup in chunks, which is handy for WSGI streaming
+    responses (encode each chunk to bytes first).
 
+    Example::
+
+        >>> doc = lazy_tag('ul', (lazy_tag('li', str(i)) for i in range(3)), {'id': 'foo'})
+        >>> list(doc)
+        ['<ul id="foo">', '<li>', '0', '</li>', '<li>', '1', '</li>', '<li>', '2', '</li>', '</ul>']
+        >>> print(lazy_tag('div', [lazy_tag('br', None), 'Hello']).render())
+        <div><br />Hello</div>
+    """
+    __slots__ = ('tagname', 'content', 'attrs')
+
+    def __init__(self, tagname, content='', attrs=None):
+        self.tagname = tagname
+        self.content = content
+        self.attrs = attrs
+
+    def __iter__(self):
+        stack = [iter((self,))]
+        while stack:
+            for item in stack[-1]:
+                if not isinstance(item, lazy_tag):
+                    yield item
+                    continue
+
+                open_tag = _open_tag(item.tagname, item.attrs)
+                if item.content is None:
+                    yield open_tag + ' />'
+                    continue
+
+                yield open_tag + '>'
+                content = iterate(item.content, unless=string_types + (lazy_tag,))
+                stack.append(itertools.chain(content, ('</%s>' % item.tagname,)))
+                break
+            else:
+                stack.pop()
+
+    def write_to(self, fp):
+        """ Write the rendered markup to the file-like object ``fp``, one
+        chunk at a time.
+        """
+        write = fp.write
+        for chunk in self:
+            write(chunk)
+
+    def render(self):
+        return literal(''.join(self))
 
-def tag_builder(tagnames):
+    __html__ = render
+
+    def __str__(self):
+        return self.render()
+
+    def __repr__(self):
+        return '%s(%r)' % (self.__class__.__name__, self.tagname)
+
+
+def tag_builder(tagnames, stream=False):
     """ Create tag-generating callables for more DSL-y goodness.
 
     :param tagnames:
         List of tag names to generate builders for.
 
+    :param stream:
+        If `True`, the builders return ``lazy_tag`` fragments instead of
+        rendered strings.
+
     Example::
 
         >>> ul, li = tag_builder(['ul', 'li'])
         >>> ul(li(ch) for ch in 'abc')
         u'<ul><li>a</li><li>b</li><li>c</li></ul>'
     """
-    return [functools.partial(tag, t) for t in tagnames]
+    if stream:
+        return [functools.partial(lazy_tag, t) for t in tagnames]
+    return [tag_template(t) for t in tagnames]
 
 
 def javascript_link(src_url, src_path=None, cache_bust=None, content='', extra_attrs=None):
@@ -1,19 +1,292 @@
-from itertools import count
+from __future__ import absolute_import
 
+import sys
+import time
+import logging
+import threading
+from itertools import count, groupby
 
-__all__ = ['enumerate_query_by_limit']
+from sqlalchemy import and_, or_, inspect
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm.state import InstanceState
 
+from unstdlib.six import reraise
+from unstdlib.six.moves import queue
+from unstdlib.standard.list_ import iterate_chunks
 
-def enumerate_query_by_limit(q, limit=1000):
+
+log = logging.getLogger(__name__)
+
+__all__ = ['enumerate_query_by_limit', 'enumerate_query_streaming', 'bulk_insert']
+
+
+def _iterate_pages_by_offset(q, limit):
+    for offset in count(0, limit):
+        r = q.offset(offset).limit(limit).all()
+        yield r
+
+        if len(r) < limit:
+            break
+
+
+def _keyset_after(columns, values):
+    # Expanded form of ``(a, b, c) > (x, y, z)``, since row-value comparisons
+    # aren't supported by every backend:
+    # a > x OR (a = x AND b > y) OR (a = x AND b = y AND c > z)
+    clauses = []
+    for i, column in enumerate(columns):
+        equal = [c == v for c, v in zip(columns[:i], values[:i])]
+        clauses.append(and_(*(equal + [column > values[i]])))
+    return or_(*clauses)
+
+
+def _iterate_pages_by_keyset(q, key, limit):
+    columns = list(key) if isinstance(key, (tuple, list)) else [key]
+    q = q.order_by(None).order_by(*columns)
+
+    page_q = q
+    while True:
+        r = page_q.limit(limit).all()
+        yield r
+
+        if len(r) < limit:
+            break
+
+        last = r[-1]
+        values = [getattr(last, column.key) for column in columns]
+        page_q = q.filter(_keyset_after(columns, values))
+
+
+def _iterate_pages(q, limit, key):
+    if key is None:
+        return _iterate_pages_by_offset(q, limit)
+    return _iterate_pages_by_keyset(q, key, limit)
+
+
+_END = object()
+
+
+def _iterate_pages_prefetched(q, limit, key, prefetch, session_factory):
+    # Fetch pages on a background thread with its own session, at most
+    # ``prefetch`` pages ahead of the consumer.
+    pages = queue.Queue(prefetch)
+    stop = threading.Event()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                pages.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def fetch():
+        session = session_factory()
+        try:
+            for page in _iterate_pages(q.with_session(session), limit, key):
+                # Detach before handing over, so the consumer never touches
+                # this thread's session.
+                session.expunge_all()
+                if not put(page):
+                    return
+            put(_END)
+        except Exception:
+            put(sys.exc_info())
+        finally:
+            session.close()
+
+    thread = threading.Thread(target=fetch)
+    thread.daemon = True
+    thread.start()
+    try:
+        while True:
+            page = pages.get()
+            if page is _END:
+                break
+            if isinstance(page, tuple):
+                reraise(*page)
+            yield page
+    finally:
+        stop.set()
+        thread.join()
+
+
+def enumerate_query_by_limit(q, limit=1000, key=None, prefetch=0, session_factory=None):
     """
     Enumerate over SQLAlchemy query object ``q`` and yield individual results
     fetched in batches of size ``limit`` using SQL LIMIT and OFFSET.
+
+    :param key:
+        Optional unique column (or tuple of columns, for a composite key) to
+        page by instead of OFFSET. Results are ordered by the key, replacing
+        any existing ordering on ``q``, and each batch continues with
+        ``WHERE key > last_seen``, so every batch costs the same no matter how
+        far into the results it is. The key values must be readable as
+        attributes of each result row.
+
+    :param prefetch:
+        Optional number of batches to fetch ahead on a background thread, so
+        the database works on the next batch while the current one is being
+        consumed. ORM instances are loaded by a separate session and expunged
+        from it before being handed over, so they are yielded detached:
+        attributes that weren't loaded by the query (like lazy relationships)
+        can't be loaded from them unless they are merged into a session.
+
+    :param session_factory:
+        Callable returning the session used for prefetching. Defaults to a
+        new session bound to the same engine as ``q``. Each session gets its
+        own connection, so an in-memory SQLite database can't be prefetched
+        from.
     """
-    for offset in count(0, limit):
-        r = q.offset(offset).limit(limit).all()
+    if prefetch:
+        if session_factory is None:
+            session_factory = sessionmaker(bind=q.session.get_bind())
+        pages = _iterate_pages_prefetched(q, limit, key, prefetch, session_factory)
+    else:
+        pages = _iterate_pages(q, limit, key)
 
+    for r in pages:
         for row in r:
             yield row
 
-        if len(r) < limit:
-            break
+
+def _iterate_instances(row):
+    # Yield the InstanceState of each ORM instance in a result row, which is
+    # either a single instance or a tuple-like row of columns and instances.
+    items = row if hasattr(row, '_fields') else (row,)
+    for item in items:
+        state = inspect(item, raiseerr=False)
+        if isinstance(state, InstanceState):
+            yield state
+
+
+def _expunge_unmodified(session, rows, keep_keys):
+    for row in rows:
+        for state in _iterate_instances(row):
+            if state.modified or state.key in keep_keys:
+                continue
+            if state.session_id == session.hash_key:
+                session.expunge(state.obj())
+
+
+def enumerate_query_streaming(q, batch_size=1000):
+    """
+    Enumerate over SQLAlchemy query object ``q`` with a server-side cursor
+    (where the database driver supports it), fetching ``batch_size`` results
+    at a time, so memory use stays flat however many rows there are.
+
+    Unmodified ORM instances loaded by the stream are expunged from the
+    session after each batch, so the identity map doesn't grow with every
+    row. Keep a reference to one past its batch and it will be detached.
+    Instances that were already in the session before streaming are left
+    alone. Progress in rows/sec is
+    logged at DEBUG level after each batch.
+    """
+    session = q.session
+    keep_keys = set(session.identity_map.keys())
+    q = q.execution_options(stream_results=True).yield_per(batch_size)
+
+    start = time.time()
+    num_rows = 0
+    batch = []
+    for row in q:
+        batch.append(row)
+        yield row
+
+        if len(batch) < batch_size:
+            continue
+
+        _expunge_unmodified(session, batch, keep_keys)
+        num_rows += len(batch)
+        batch = []
+
+        elapsed = max(time.time() - start, 1e-6)
+        log.debug("Streamed %d rows (%.1f rows/sec)", num_rows, num_rows / elapsed)
+
+    _expunge_unmodified(session, batch, keep_keys)
+    num_rows += len(batch)
+    log.debug("Streamed %d rows in %.2fs", num_rows, time.time() - start)
+
+
+def _insert_statement(dialect, table, keys, on_conflict, conflict_columns):
+    if on_conflict is None:
+        return table.insert()
+
+    if dialect.name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect.name == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise ValueError("on_conflict is not supported for dialect: %s" % dialect.name)
+
+    if conflict_columns is None:
+        conflict_columns = [c.name for c in table.primary_key.columns]
+    else:
+        conflict_columns = [getattr(c, 'name', c) for c in conflict_columns]
+
+    stmt = insert(table)
+    if on_conflict == 'ignore':
+        return stmt.on_conflict_do_nothing(index_elements=conflict_columns)
+
+    if on_conflict == 'update':
+        update = dict((k, stmt.excluded[k]) for k in keys if k not in conflict_columns)
+        if not update:
+            return stmt.on_conflict_do_nothing(index_elements=conflict_columns)
+        return stmt.on_conflict_do_update(index_elements=conflict_columns, set_=update)
+
+    raise ValueError("on_conflict is not valid: %s" % on_conflict)
+
+
+def bulk_insert(session_or_conn, table, rows, batch_size=1000, on_conflict=None, conflict_columns=None, commit=False):
+    """
+    Insert an iterable of dicts ``rows`` into ``table`` in batches of size
+    ``batch_size``, with one executemany per batch (or per run of rows with
+    the same keys, if they differ). Returns the number of rows inserted (or
+    attempted, for conflicting rows).
+
+    :param table:
+        ``Table`` or mapped class to insert into.
+
+    :param on_conflict:
+        Optional upsert behaviour when a row conflicts with an existing one:
+        ``'ignore'`` to skip it, or ``'update'`` to overwrite the existing row
+        with the columns being inserted. Supported on PostgreSQL and SQLite.
+
+    :param conflict_columns:
+        Columns (or column names) of the unique constraint to check for
+        conflicts. Defaults to the primary key.
+
+    :param commit:
+        If `True`, commit after each batch rather than leaving it to the
+        caller, so a long-running load doesn't hold one huge transaction.
+
+    Throughput in rows/sec is logged at DEBUG level after each batch.
+    """
+    table = getattr(table, '__table__', table)
+    if hasattr(session_or_conn, 'get_bind'):
+        dialect = session_or_conn.get_bind().dialect
+    else:
+        dialect = session_or_conn.dialect
+
+    start = time.time()
+    num_rows = 0
+    stmts = {}
+    for batch in iterate_chunks(rows, size=batch_size):
+        # An executemany only inserts the columns of its statement, so rows
+        # with different keys go into separate runs (in order) rather than
+        # silently losing values.
+        for keys, run in groupby(batch, key=frozenset):
+            stmt = stmts.get(keys)
+            if stmt is None:
+                stmt = stmts[keys] = _insert_statement(dialect, table, keys, on_conflict, conflict_columns)
+
+            session_or_conn.execute(stmt, list(run))
+        if commit:
+            session_or_conn.commit()
+
+        num_rows += len(batch)
+        elapsed = max(time.time() - start, 1e-6)
+        log.debug("Inserted %d rows into %s (%.1f rows/sec)", num_rows, table.name, num_rows / elapsed)
+
+    return num_rows
@@ -1,4 +1,8 @@
-from collections import MutableMapping, OrderedDict
+try:
+    from collections.abc import MutableMapping
+except ImportError:
+    from collections import MutableMapping
+from collections import OrderedDict
 from threading import Lock
 
 
@@ -1,10 +1,20 @@
+import copy
+import time
+import bisect
 import calendar
 import datetime
+from array import array
 
+from unstdlib.six import string_types, integer_types
+from unstdlib.six.moves import xrange
 
-__all__ = ['iterate_date', 'iterate_date_values', 'isoformat_as_datetime',
-           'truncate_datetime', 'now', 'datetime_from_timestamp',
-           'timestamp_from_datetime']
+
+__all__ = ['iterate_date', 'date_range', 'iterate_date_values',
+           'bucket_date_values', 'isoformat_as_datetime',
+           'isoformat_as_datetime_many', 'truncate_datetime', 'truncate_many',
+           'now', 'coarse_now',
+           'datetime_from_timestamp', 'timestamp_from_datetime',
+           'datetime_from_timestamp_many', 'timestamp_from_datetime_many']
 
 
 def iterate_date(start, stop=None, step=datetime.timedelta(days=1)):
@@ -13,6 +23,107 @@ def iterate_date(start, stop=None, step=datetime.timedelta(days=1)):
         start += step
 
 
+def _add_months(t, months):
+    year, month = divmod(t.month - 1 + months, 12)
+    year += t.year
+    day = min(t.day, calendar.monthrange(year, month + 1)[1])
+    return t.replace(year=year, month=month + 1, day=day)
+
+def _timedelta_microseconds(delta):
+    return (delta.days * 86400 + delta.seconds) * 1000000 + delta.microseconds
+
+_MONTH_STEPS = {'month': 1, 'quarter': 3, 'year': 12}
+
+
+class date_range(object):
+    """
+    Sequence of dates from ``start`` to ``stop`` (inclusive), every ``step``.
+
+    ``step`` is either a ``datetime.timedelta`` (which can be negative), or
+    one of: month, quarter, year. Calendar steps are always counted from
+    ``start``, and land on the last day of shorter months when needed.
+
+    Unlike ``iterate_date``, the length and each element are computed
+    arithmetically, so ranges can be sized, indexed, sliced and reversed
+    without iterating over them. Slices are ``date_range`` objects too.
+
+    Example::
+
+        >>> r = date_range(datetime.date(2011, 1, 31), datetime.date(2011, 12, 31), 'quarter')
+        >>> len(r)
+        4
+        >>> list(r)
+        [datetime.date(2011, 1, 31), datetime.date(2011, 4, 30), datetime.date(2011, 7, 31), datetime.date(2011, 10, 31)]
+        >>> r[-1]
+        datetime.date(2011, 10, 31)
+        >>> list(reversed(r[1:]))
+        [datetime.date(2011, 10, 31), datetime.date(2011, 7, 31), datetime.date(2011, 4, 30)]
+        >>> r = date_range(datetime.date(2011, 1, 1), datetime.date(2011, 1, 10))
+        >>> len(r), r[4]
+        (10, datetime.date(2011, 1, 5))
+        >>> list(r[1::4])  # E.g. the share of worker 1 out of 4.
+        [datetime.date(2011, 1, 2), datetime.date(2011, 1, 6), datetime.date(2011, 1, 10)]
+    """
+    def __init__(self, start, stop, step=datetime.timedelta(days=1)):
+        self.start = start
+        self.stop = stop
+        self.step = step
+
+        if isinstance(step, string_types):
+            try:
+                self._months = _MONTH_STEPS[step]
+            except KeyError:
+                raise KeyError("Step is not valid: {0}".format(step))
+        elif not step:
+            raise ValueError("Step must not be zero.")
+        else:
+            self._months = None
+
+        self._offset = 0
+        self._stride = 1
+        self._length = max(self._count(), 0)
+
+    def _count(self):
+        if self._months is None:
+            span = _timedelta_microseconds(self.stop - self.start)
+            return span // _timedelta_microseconds(self.step) + 1
+
+        n = ((self.stop.year - self.start.year) * 12 + self.stop.month - self.start.month) // self._months
+        if self._at(n) > self.stop:
+            n -= 1
+        return n + 1
+
+    def _at(self, n):
+        if self._months is None:
+            return self.start + self.step * n
+        return _add_months(self.start, n * self._months)
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            indices = xrange(*key.indices(self._length))
+            r = copy.copy(self)
+            r._offset = self._offset + indices[0] * self._stride if indices else 0
+            r._stride = self._stride * (key.step or 1)
+            r._length = len(indices)
+            return r
+
+        if key < 0:
+            key += self._length
+        if not 0 <= key < self._length:
+            raise IndexError("date_range index out of range")
+        return self._at(self._offset + key * self._stride)
+
+    def __iter__(self):
+        for i in xrange(self._length):
+            yield self._at(self._offset + i * self._stride)
+
+    def __reversed__(self):
+        return iter(self[::-1])
+
+
 def iterate_date_values(d, start_date=None, stop_date=None, default=0):
     """
     Convert (date, value) sorted lists into contiguous value-per-day data sets. Great for sparklines.
@@ -23,38 +134,250 @@ def iterate_date_values(d, start_date=None, stop_date=None, default=0):
 
     """
     dataiter = iter(d)
-    cur_day, cur_val = next(dataiter)
+    cur_day, cur_val = next(dataiter, (None, None))
 
     start_date = start_date or cur_day
+    if start_date is None:
+        return
 
-    while cur_day < start_date:
-        cur_day, cur_val = next(dataiter)
+    while cur_day is not None and cur_day < start_date:
+        cur_day, cur_val = next(dataiter, (None, None))
 
     for d in iterate_date(start_date, stop_date):
+        if cur_day is None and not stop_date:
+            return
+
         if d != cur_day:
             yield default
             continue
 
         yield cur_val
-        try:
-            cur_day, cur_val = next(dataiter)
-        except StopIteration:
-            if not stop_date:
-                raise
+        cur_day, cur_val = next(dataiter, (None, None))
+
+
+def _hour_offset(t, start):
+    delta = t - start
+    return delta.days * 24 + delta.seconds // 3600
+
+def _day_offset(t, start):
+    return (t - start).days
+
+def _week_offset(t, start):
+    return (t - start).days // 7
+
+def _month_offset(t, start):
+    return (t.year - start.year) * 12 + t.month - start.month
+
+_BUCKET_OFFSETS = {
+    'hour': _hour_offset,
+    'day': _day_offset,
+    'week': _week_offset,
+    'month': _month_offset,
+}
+
+def _bucket_start(t, resolution):
+    # Align to the start of the bucket, so offsets count calendar boundaries
+    # rather than whole periods since ``t``.
+    if isinstance(t, datetime.datetime):
+        return _TRUNCATE_STRATEGIES[resolution](t).replace(tzinfo=t.tzinfo)
+    if resolution == 'week':
+        return t - datetime.timedelta(days=t.weekday())
+    return t
+
+def bucket_date_values(d, start_date=None, stop_date=None, default=0, resolution='day', typecode='d'):
+    """
+    Convert (date, value) lists into an ``array.array`` of contiguous
+    value-per-``resolution`` buckets, like a bulk ``iterate_date_values``.
+
+    ``d`` does not need to be sorted. Values which fall into the same bucket
+    are summed, buckets without values are ``default``, and values outside of
+    ``start_date`` and ``stop_date`` (which default to the earliest and latest
+    dates in ``d``) are ignored.
 
+    ``resolution`` can be one of: hour, day, week, month. Buckets follow
+    calendar boundaries, with weeks starting on Monday, so the first bucket
+    starts at ``start_date`` truncated to the ``resolution``.
+
+    Example::
+
+        >>> bucket_date_values([(datetime.date(2011, 1, 4), 2), (datetime.date(2011, 1, 1), 1)])
+        array('d', [1.0, 0.0, 0.0, 2.0])
+        >>> bucket_date_values([
+        ...     (datetime.date(2011, 3, 9), 2),
+        ...     (datetime.date(2011, 1, 1), 1),
+        ...     (datetime.date(2011, 3, 1), 3),
+        ... ], resolution='month', typecode='l')
+        array('l', [1, 0, 5])
+        >>> bucket_date_values([
+        ...     (datetime.datetime(2011, 1, 1, 23), 1),
+        ...     (datetime.datetime(2011, 1, 2, 1), 2),
+        ... ])
+        array('d', [1.0, 2.0])
+        >>> bucket_date_values([
+        ...     (datetime.datetime(2011, 1, 1, 10, 45), 1),
+        ...     (datetime.datetime(2011, 1, 1, 11, 15), 2),
+        ... ], resolution='hour')
+        array('d', [1.0, 2.0])
+    """
+    try:
+        offset = _BUCKET_OFFSETS[resolution]
+    except KeyError:
+        raise KeyError("Resolution is not valid: {0}".format(resolution))
+
+    if not isinstance(d, (list, tuple)):
+        d = list(d)
+
+    if not (start_date and stop_date):
+        if not d:
+            return array(typecode)
+        dates = [t for t, value in d]
+        start_date = start_date or min(dates)
+        stop_date = stop_date or max(dates)
+
+    start_date = _bucket_start(start_date, resolution)
+    stop_date = _bucket_start(stop_date, resolution)
+    size = offset(stop_date, start_date) + 1
+    if size <= 0:
+        return array(typecode)
+
+    r = array(typecode, [default]) * size
+    seen = bytearray(size)
+    for t, value in d:
+        i = offset(t, start_date)
+        if not 0 <= i < size:
+            continue
+        if seen[i]:
+            r[i] += value
+        else:
+            r[i] = value
+            seen[i] = 1
+
+    return r
+
+
+def _parse_isoformat(s):
+    """
+    Parse ``YYYY-MM-DDTHH:MM:SS[.ffffff][Z|+HH:MM|-HH:MM]`` by slicing,
+    returning a naive datetime in UTC.
+
+    Example::
+
+        >>> _parse_isoformat('2011-01-02T03:04:05.25-02:30')
+        datetime.datetime(2011, 1, 2, 5, 34, 5, 250000)
+    """
+    if len(s) < 19 or s[4] != '-' or s[7] != '-' or s[10] not in 'T ' \
+            or s[13] != ':' or s[16] != ':':
+        raise ValueError("Invalid isoformat string: %r" % s)
+
+    dt = datetime.datetime(
+        int(s[0:4]), int(s[5:7]), int(s[8:10]),
+        int(s[11:13]), int(s[14:16]), int(s[17:19]),
+    )
+
+    rest = s[19:]
+    if rest[:1] == '.':
+        end = 1
+        while end < len(rest) and rest[end].isdigit():
+            end += 1
+        if end == 1:
+            raise ValueError("Invalid isoformat string: %r" % s)
+        dt = dt.replace(microsecond=int(rest[1:end][:6].ljust(6, '0')))
+        rest = rest[end:]
+
+    if not rest or rest == 'Z':
+        return dt
+
+    sign = rest[0]
+    if sign not in '+-' or len(rest) not in (5, 6) or (len(rest) == 6 and rest[3] != ':'):
+        raise ValueError("Invalid isoformat string: %r" % s)
+
+    offset = datetime.timedelta(hours=int(rest[1:3]), minutes=int(rest[-2:]))
+    if sign == '+':
+        return dt - offset
+    return dt + offset
+
+
+_fromisoformat = getattr(datetime.datetime, 'fromisoformat', None)
 
 def isoformat_as_datetime(s):
     """
     Convert a datetime.datetime.isoformat() string to a datetime.datetime() object.
+
+    Fractional seconds and UTC offsets are supported. The result is always a
+    naive datetime in UTC.
+
+    Example::
+
+        >>> isoformat_as_datetime('2011-01-02T03:04:05Z')
+        datetime.datetime(2011, 1, 2, 3, 4, 5)
+        >>> isoformat_as_datetime('2011-01-02T03:04:05.006000+01:00')
+        datetime.datetime(2011, 1, 2, 2, 4, 5, 6000)
     """
-    return datetime.datetime.strptime(s, '%Y-%m-%dT%H:%M:%SZ')
+    if _fromisoformat is None:
+        return _parse_isoformat(s)
+
+    try:
+        # Before Python 3.11, fromisoformat doesn't accept the 'Z' suffix.
+        dt = _fromisoformat(s[:-1] if s[-1:] == 'Z' else s)
+    except ValueError:
+        return _parse_isoformat(s)
+
+    offset = dt.utcoffset()
+    if offset is None:
+        return dt
+    return dt.replace(tzinfo=None) - offset
+
+
+def isoformat_as_datetime_many(strings):
+    """
+    Return a list of ``isoformat_as_datetime(s)`` for each of ``strings``.
+
+    Example::
+
+        >>> isoformat_as_datetime_many(['2011-01-02T03:04:05Z', '2011-01-02T03:04:05.5Z'])
+        [datetime.datetime(2011, 1, 2, 3, 4, 5), datetime.datetime(2011, 1, 2, 3, 4, 5, 500000)]
+    """
+    return [isoformat_as_datetime(s) for s in strings]
+
+
+_TRUNCATE_STRATEGIES = {
+    'year': lambda t: datetime.datetime(t.year, 1, 1),
+    'quarter': lambda t: datetime.datetime(t.year, t.month - (t.month - 1) % 3, 1),
+    'month': lambda t: datetime.datetime(t.year, t.month, 1),
+    'week': lambda t: datetime.datetime(t.year, t.month, t.day) - datetime.timedelta(days=t.weekday()),
+    'day': lambda t: datetime.datetime(t.year, t.month, t.day),
+    'hour': lambda t: datetime.datetime(t.year, t.month, t.day, t.hour),
+    'minute': lambda t: datetime.datetime(t.year, t.month, t.day, t.hour, t.minute),
+    'second': lambda t: datetime.datetime(t.year, t.month, t.day, t.hour, t.minute, t.second),
+    'microsecond': lambda t: datetime.datetime(t.year, t.month, t.day, t.hour, t.minute, t.second, t.microsecond),
+}
+
+def _truncate_strategy(resolution):
+    if isinstance(resolution, datetime.timedelta):
+        width = _timedelta_microseconds(resolution)
+        if width <= 0:
+            raise ValueError("Resolution must be positive: {0}".format(resolution))
+
+        def truncate_delta(t):
+            us = _timedelta_microseconds(t.replace(tzinfo=None) - _EPOCH)
+            return _EPOCH + datetime.timedelta(microseconds=us - us % width)
+        return truncate_delta
+
+    try:
+        return _TRUNCATE_STRATEGIES[resolution]
+    except KeyError:
+        raise KeyError("Resolution is not valid: {0}".format(resolution))
 
 
 def truncate_datetime(t, resolution):
     """
     Given a datetime ``t`` and a ``resolution``, flatten the precision beyond the given resolution.
 
-    ``resolution`` can be one of: year, month, day, hour, minute, second, microsecond
+    ``resolution`` can be one of: year, quarter, month, week, day, hour, minute, second, microsecond
+
+    It can also be a ``datetime.timedelta``, in which case ``t`` is flattened
+    to a multiple of it since the epoch, such as 15-minute buckets. Weeks
+    start on Monday.
 
     Example::
 
@@ -70,19 +393,115 @@ def truncate_datetime(t, resolution):
         >>> _.isoformat()
         '2000-01-02T03:04:00'
 
+        >>> truncate_datetime(t, 'week')
+        datetime.datetime(1999, 12, 27, 0, 0)
+        >>> truncate_datetime(t, 'quarter')
+        datetime.datetime(2000, 1, 1, 0, 0)
+        >>> truncate_datetime(t, datetime.timedelta(minutes=15))
+        datetime.datetime(2000, 1, 2, 3, 0)
+
     """
+    return _truncate_strategy(resolution)(t)
 
-    resolutions = ['year', 'month', 'day', 'hour', 'minute', 'second', 'microsecond']
-    if resolution not in resolutions:
-        raise KeyError("Resolution is not valid: {0}".format(resolution))
 
-    args = []
-    for r in resolutions:
-        args += [getattr(t, r)]
-        if r == resolution:
-            break
+_TRUNCATE_SECONDS = {
+    'microsecond': 1,
+    'second': 1,
+    'minute': 60,
+    'hour': 3600,
+    'day': 86400,
+}
+_WEEK_SECONDS = 7 * 86400
+_MONDAY_SECONDS = 4 * 86400 # The epoch was on a Thursday.
+
+def _truncate_epoch_strategy(resolution):
+    if isinstance(resolution, datetime.timedelta):
+        width, remainder = divmod(_timedelta_microseconds(resolution), 1000000)
+        if width <= 0 or remainder:
+            # Bucket boundaries have to be whole seconds to match
+            # truncate_datetime with integer timestamps.
+            raise ValueError("Resolution must be a whole number of seconds: {0}".format(resolution))
+    else:
+        width = _TRUNCATE_SECONDS.get(resolution)
+
+    if width:
+        return lambda v: v - v % width
+
+    if resolution == 'week':
+        return lambda v: v - (v - _MONDAY_SECONDS) % _WEEK_SECONDS
+
+    truncate = _truncate_strategy(resolution)
+    return lambda v: int(timestamp_from_datetime(truncate(datetime_from_timestamp(v))))
 
-    return datetime.datetime(*args)
+
+def truncate_many(values, resolution):
+    """
+    Return a list of ``truncate_datetime(t, resolution)`` for each of ``values``.
+
+    ``values`` can also be integer timestamps (or an ``array.array`` of them,
+    with an integer typecode), in which case they're truncated using integer
+    arithmetic and the result is of the same kind.
+
+    Example::
+
+        >>> truncate_many([datetime.datetime(2000, 1, 2, 3, 4), datetime.datetime(2000, 1, 2, 3, 44)], 'hour')
+        [datetime.datetime(2000, 1, 2, 3, 0), datetime.datetime(2000, 1, 2, 3, 0)]
+        >>> truncate_many(array('l', [946782240, 946784640]), 'hour')
+        array('l', [946782000, 946782000])
+        >>> truncate_many([946782240], 'week')
+        [946252800]
+        >>> truncate_many([10], datetime.timedelta(seconds=1.5))
+        Traceback (most recent call last):
+        ...
+        ValueError: Resolution must be a whole number of seconds: 0:00:01.500000
+        >>> truncate_many(array('d', [1.5]), 'microsecond')
+        Traceback (most recent call last):
+        ...
+        TypeError: Timestamp arrays must have an integer typecode: d
+    """
+    if isinstance(values, array):
+        if values.typecode in 'fd':
+            # Integer arithmetic would drop the fractional seconds.
+            raise TypeError("Timestamp arrays must have an integer typecode: {0}".format(values.typecode))
+        truncate = _truncate_epoch_strategy(resolution)
+        return array(values.typecode, map(truncate, values))
+
+    if not isinstance(values, (list, tuple)):
+        values = list(values)
+
+    if values and isinstance(values[0], integer_types):
+        truncate = _truncate_epoch_strategy(resolution)
+    else:
+        truncate = _truncate_strategy(resolution)
+    return list(map(truncate, values))
+
+# Cache of ``timezone -> (start, stop, offset, tzinfo)``, where ``offset`` and
+# ``tzinfo`` are valid for naive UTC datetimes from ``start`` until ``stop``
+# (usually the next DST transition).
+_TIMEZONE_WINDOWS = {}
+
+def _convert_timezone(dt, timezone):
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=_UTC())
+    dt = dt.astimezone(timezone)
+    normalize = getattr(timezone, 'normalize', None)
+    return normalize(dt) if normalize else dt
+
+def _timezone_window(timezone, utc_dt):
+    transitions = getattr(timezone, '_utc_transition_times', None)
+    if transitions is not None:
+        # A pytz timezone with DST transitions.
+        i = bisect.bisect_right(transitions, utc_dt)
+        start = transitions[i - 1] if i else datetime.datetime.min
+        stop = transitions[i] if i < len(transitions) else datetime.datetime.max
+    elif timezone.utcoffset(None) is not None:
+        # A fixed offset timezone.
+        start, stop = datetime.datetime.min, datetime.datetime.max
+    else:
+        return
+
+    local_dt = _convert_timezone(utc_dt, timezone)
+    return start, stop, local_dt.utcoffset(), local_dt.tzinfo
 
 def to_timezone(dt, timezone):
     """
@@ -94,10 +513,21 @@ def to_timezone(dt, timezone):
     then the result will be "02:00 EDT-0400".
 
     This method follows the guidelines in http://pytz.sourceforge.net/
+
+    For pytz and fixed offset timezones, the UTC offset is cached until the
+    next DST transition so that most conversions are a single addition.
     """
-    if dt.tzinfo is None:
-        dt = dt.replace(tzinfo=_UTC)
-    return timezone.normalize(dt.astimezone(timezone))
+    offset = dt.utcoffset()
+    utc_dt = dt if offset is None else dt.replace(tzinfo=None) - offset
+
+    window = _TIMEZONE_WINDOWS.get(timezone)
+    if window is None or not window[0] <= utc_dt < window[1]:
+        window = _timezone_window(timezone, utc_dt)
+        if window is None:
+            return _convert_timezone(dt, timezone)
+        _TIMEZONE_WINDOWS[timezone] = window
+
+    return (utc_dt + window[2]).replace(tzinfo=window[3])
 
 def now(timezone=None):
     """
@@ -115,6 +545,35 @@ def now(timezone=None):
 
     return to_timezone(d, timezone).replace(tzinfo=None)
 
+_monotonic = getattr(time, 'monotonic', time.time)
+
+class coarse_now(object):
+    """
+    A clock which returns ``now(timezone)``, but only refreshes it at most
+    every ``interval`` seconds. Useful for timestamping in hot paths where
+    millisecond precision isn't needed.
+
+    Example::
+
+        >>> clock = coarse_now(interval=60)
+        >>> clock() is clock()
+        True
+    """
+    def __init__(self, timezone=None, interval=0.01):
+        self.timezone = timezone
+        self.interval = interval
+        self._value = None
+        self._expires = None
+
+    def __call__(self):
+        t = _monotonic()
+        if self._expires is None or t >= self._expires:
+            self._value = now(self.timezone)
+            self._expires = t + self.interval
+        return self._value
+
+_EPOCH = datetime.datetime(1970, 1, 1)
+
 def datetime_from_timestamp(timestamp):
     """
     Returns a naive datetime from ``timestamp``.
@@ -124,6 +583,14 @@ def datetime_from_timestamp(timestamp):
     """
     return datetime.datetime.utcfromtimestamp(timestamp)
 
+def _datetime_to_timestamp(dt):
+    # Shared by timestamp_from_datetime and timestamp_from_datetime_many.
+    offset = dt.utcoffset()
+    if offset is not None:
+        dt = dt.replace(tzinfo=None) - offset
+    delta = dt - _EPOCH
+    return (delta.days * 86400 + delta.seconds) + (delta.microseconds / 1000000.0)
+
 def timestamp_from_datetime(dt):
     """
     Returns a timestamp from datetime ``dt``.
@@ -134,7 +601,27 @@ def timestamp_from_datetime(dt):
     >>> timestamp_from_datetime(datetime.datetime(1970, 1, 1, 0, 20, 34, 500000))
     1234.5
     """
-    return calendar.timegm(dt.utctimetuple()) + (dt.microsecond / 1000000.0)
+    return _datetime_to_timestamp(dt)
+
+def datetime_from_timestamp_many(timestamps):
+    """
+    Returns a list of ``datetime_from_timestamp(timestamp)`` for each of
+    ``timestamps``.
+
+    >>> datetime_from_timestamp_many([0, 1234.5])
+    [datetime.datetime(1970, 1, 1, 0, 0), datetime.datetime(1970, 1, 1, 0, 20, 34, 500000)]
+    """
+    utcfromtimestamp = datetime.datetime.utcfromtimestamp
+    return [utcfromtimestamp(t) for t in timestamps]
+
+def timestamp_from_datetime_many(dts):
+    """
+    Returns a list of ``timestamp_from_datetime(dt)`` for each of ``dts``.
+
+    >>> timestamp_from_datetime_many([datetime.datetime(1970, 1, 1), datetime.datetime(1970, 1, 1, 0, 20, 34, 500000)])
+    [0.0, 1234.5]
+    """
+    return list(map(_datetime_to_timestamp, dts))
 
 # Built-in timezone for when pytz isn't available:
 
@@ -1,6 +1,6 @@
-from itertools import chain
+from itertools import chain, islice
 from functools import wraps
-from collections import defaultdict
+from collections import defaultdict, deque
 
 from unstdlib.six import string_types
 from unstdlib.six.moves import xrange
@@ -9,7 +9,8 @@ from unstdlib.six.moves import xrange
 __all__ = [
     'groupby_count',
     'iterate', 'is_iterable', 'iterate_chunks', 'iterate_items', 'iterate_flatten',
-    'listify',
+    'iterate_window', 'iterate_partitioned',
+    'listify', 'lazy_list',
 ]
 
 
@@ -129,6 +130,86 @@ def iterate_chunks(i, size=10):
         yield accumulator
 
 
+def iterate_window(i, size=2, step=1):
+    """
+    Iterate over an iterator ``i`` with a sliding window of ``size`` elements,
+    advancing by ``step`` elements at a time. Yields tuples. Trailing elements
+    which don't fill a complete window are dropped.
+
+    Example::
+
+        >>> list(iterate_window([1, 2, 3, 4]))
+        [(1, 2), (2, 3), (3, 4)]
+        >>> list(iterate_window([1, 2, 3, 4, 5], size=3, step=2))
+        [(1, 2, 3), (3, 4, 5)]
+        >>> list(iterate_window([1, 2, 3, 4, 5, 6], size=2, step=3))
+        [(1, 2), (4, 5)]
+        >>> list(iterate_window([1, 2, 3], step=0))
+        Traceback (most recent call last):
+        ...
+        ValueError: step must be at least 1: 0
+    """
+    if size < 1:
+        raise ValueError("size must be at least 1: %s" % size)
+    if step < 1:
+        raise ValueError("step must be at least 1: %s" % step)
+
+    i = iter(i)
+    window = deque(islice(i, size), maxlen=size)
+    if len(window) < size:
+        return
+
+    yield tuple(window)
+
+    skip = max(step - size, 0)
+    take = min(step, size)
+    while True:
+        if skip:
+            next(islice(i, skip, skip), None)
+
+        n = 0
+        for n, item in enumerate(islice(i, take), 1):
+            window.append(item)
+
+        if n < take:
+            return
+
+        yield tuple(window)
+
+
+def iterate_partitioned(i, key, size=10):
+    """
+    Iterate over an iterator ``i``, partitioning its elements by ``key(element)``
+    into chunks of up to ``size`` elements. Yields ``(key, chunk)`` pairs as
+    soon as a chunk is full, then flushes the remaining partial chunks in the
+    order their keys were first seen.
+
+    Example::
+
+        >>> list(iterate_partitioned([1, 2, 3, 4, 5, 6, 7], key=lambda n: n % 2, size=2))
+        [(1, [1, 3]), (0, [2, 4]), (1, [5, 7]), (0, [6])]
+    """
+    partitions = {}
+    keys = []
+
+    for item in i:
+        k = key(item)
+        try:
+            accumulator = partitions[k]
+        except KeyError:
+            accumulator = partitions[k] = []
+            keys.append(k)
+
+        accumulator.append(item)
+        if len(accumulator) >= size:
+            yield k, accumulator
+            partitions[k] = []
+
+    for k in keys:
+        if partitions[k]:
+            yield k, partitions[k]
+
+
 def iterate_flatten(q):
     """
     Flatten nested lists.
@@ -146,13 +227,123 @@ def iterate_flatten(q):
     return chain.from_iterable(q)
 
 
-def listify(fn=None, wrapper=list):
+def _iterate_bounded(i, max_items):
+    i = iter(i)
+    for item in islice(i, max_items):
+        yield item
+
+    for _ in i:
+        raise ValueError("Iterable exceeded max_items: %d" % max_items)
+
+
+class lazy_list(object):
+    """
+    A read-only sequence which consumes the wrapped iterable only as far as
+    it needs to. Indexing pulls items up to the requested index, ``len()``
+    consumes everything. Consumed items are cached, so the iterable is only
+    walked once.
+
+    Useful as a ``wrapper`` for ``listify`` when callers often only look at
+    the first few results.
+
+    Example::
+
+        >>> def numbers():
+        ...     for i in xrange(5):
+        ...         print("Generating %d" % i)
+        ...         yield i
+        >>> l = lazy_list(numbers())
+        >>> l[1]
+        Generating 0
+        Generating 1
+        1
+        >>> l[0]
+        0
+        >>> len(l)
+        Generating 2
+        Generating 3
+        Generating 4
+        5
+        >>> list(l)
+        [0, 1, 2, 3, 4]
+        >>> l[-2:]
+        [3, 4]
+    """
+    def __init__(self, iterable):
+        self._iter = iter(iterable)
+        self._items = []
+
+    def _fill(self, size=None):
+        if self._iter is None:
+            return
+
+        if size is None:
+            self._items.extend(self._iter)
+            self._iter = None
+            return
+
+        missing = size - len(self._items)
+        if missing > 0:
+            self._items.extend(islice(self._iter, missing))
+            if len(self._items) < size:
+                self._iter = None
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            start, stop, step = key.start or 0, key.stop, key.step or 1
+            if stop is None or min(start, stop, step) < 0:
+                self._fill()
+            else:
+                self._fill(stop)
+        elif key < 0:
+            self._fill()
+        else:
+            self._fill(key + 1)
+        return self._items[key]
+
+    def __len__(self):
+        self._fill()
+        return len(self._items)
+
+    def __bool__(self):
+        self._fill(1)
+        return bool(self._items)
+
+    __nonzero__ = __bool__
+
+    def __iter__(self):
+        n = 0
+        while True:
+            if n >= len(self._items):
+                self._fill(n + 1)
+                if n >= len(self._items):
+                    return
+            yield self._items[n]
+            n += 1
+
+    def __repr__(self):
+        more = ', ...' if self._iter is not None else ''
+        return "%s([%s%s])" % (
+            type(self).__name__, ', '.join(map(repr, self._items)), more,
+        )
+
+
+def listify(fn=None, wrapper=list, max_items=None):
     """
     A decorator which wraps a function's return value in ``list(...)``.
 
     Useful when an algorithm can be expressed more cleanly as a generator but
     the function should return an list.
 
+    :param wrapper:
+        Callable which is given the generator, ``list`` by default. Use
+        ``lazy_list`` to only consume as much as the caller needs, or an
+        ``array.array`` constructor to store numeric results compactly.
+
+    :param max_items:
+        If set, raise ``ValueError`` once the generator yields more than
+        ``max_items`` values instead of accumulating them.
+
     Example::
 
         >>> @listify
@@ -168,11 +359,30 @@ def listify(fn=None, wrapper=list):
         ...         yield len(i)
         >>> get_lengths_tuple(["foo", "bar"])
         (3, 3)
+        >>>
+        >>> from array import array
+        >>> @listify(wrapper=lambda i: array('l', i))
+        ... def get_lengths_array(iterable):
+        ...     for i in iterable:
+        ...         yield len(i)
+        >>> get_lengths_array(["spam", "eggs"])
+        array('l', [4, 4])
+        >>>
+        >>> @listify(max_items=2)
+        ... def get_lengths_bounded(iterable):
+        ...     for i in iterable:
+        ...         yield len(i)
+        >>> get_lengths_bounded(["a", "bb", "ccc"])
+        Traceback (most recent call last):
+          ...
+        ValueError: Iterable exceeded max_items: 2
     """
     def listify_return(fn):
         @wraps(fn)
         def listify_helper(*args, **kw):
-            return wrapper(fn(*args, **kw))
+            if max_items is None:
+                return wrapper(fn(*args, **kw))
+            return wrapper(_iterate_bounded(fn(*args, **kw), max_items))
         return listify_helper
     if fn is None:
         return listify_return
@@ -1,8 +1,16 @@
 import re
+import math
+import codecs
 import string
+import struct
+import binascii
 import unicodedata
+from array import array
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+from functools import partial
 
-from unstdlib.six import text_type, PY3, string_types, binary_type, u
+from unstdlib.six import text_type, PY3, string_types, binary_type, integer_types, u
 from unstdlib.six.moves import xrange
 
 if PY3:
@@ -14,12 +22,15 @@ from .random_ import random
 
 
 __all__ = [
-    'random_string',
+    'random_string', 'random_strings',
     'number_to_string', 'string_to_number', 'number_to_bytes', 'bytes_to_number',
-    'dollars_to_cents',
-    'to_str', 'to_unicode', 'to_int', 'to_float',
+    'number_to_bytes_many', 'bytes_to_number_many',
+    'Codec',
+    'dollars_to_cents', 'dollars_to_cents_many', 'cents_to_dollars', 'cents_to_dollars_many',
+    'to_str', 'to_unicode', 'to_int', 'to_float', 'to_int_many', 'to_float_many',
+    'iterate_unicode', 'register_converter',
     'format_int',
-    'slugify',
+    'slugify', 'slugify_many',
 ]
 
 class r(object):
@@ -47,7 +58,60 @@ def random_string(length=6, alphabet=string.ascii_letters+string.digits):
 
     Default alphabet is url-friendly (base62).
     """
-    return ''.join([random.choice(alphabet) for i in xrange(length)])
+    return random_strings(1, length, alphabet)[0]
+
+
+def random_strings(count, length=6, alphabet=string.ascii_letters+string.digits):
+    """
+    Return a list of ``count`` random strings of given length and alphabet.
+
+    Randomness is drawn in bulk rather than once per character, and mapped
+    onto the alphabet with rejection sampling so that every character is
+    equally likely.
+
+    Example::
+
+        >>> tokens = random_strings(3, length=8, alphabet='abc')
+        >>> len(tokens), [len(t) for t in tokens]
+        (3, [8, 8, 8])
+        >>> set(''.join(tokens)) <= set('abc')
+        True
+        >>> random_strings(1, alphabet='')
+        Traceback (most recent call last):
+        ...
+        IndexError: Cannot choose from an empty alphabet
+    """
+    base = len(alphabet)
+    if not base and length:
+        # Same exception type as random.choice(''), which this used to be.
+        raise IndexError("Cannot choose from an empty alphabet")
+    if base > 256:
+        return [
+            ''.join([random.choice(alphabet) for i in xrange(length)])
+            for n in xrange(count)
+        ]
+
+    indices = _iterate_random_indices(base, count * length)
+    return [
+        ''.join([alphabet[i] for i in islice(indices, length)])
+        for n in xrange(count)
+    ]
+
+
+def _iterate_random_indices(base, size):
+    """
+    Yield uniformly random integers in ``[0, base)``, for ``base <= 256``,
+    drawing at least ``size`` random bytes at a time.
+    """
+    # Bytes at or beyond the largest multiple of ``base`` would bias the
+    # modulo towards the start of the alphabet, so they're skipped.
+    limit = 256 - 256 % base
+    size = max(size + size // 4, 64)
+    while True:
+        chunk = number_to_bytes(random.getrandbits(size * 8), length=size)
+        for ch in bytearray(chunk):
+            if ch < limit:
+                yield ch % base
 
 
 def number_to_string(n, alphabet):
@@ -71,16 +135,7 @@ def number_to_string(n, alphabet):
         'one two three four five '
 
     """
-    result = ''
-    base = len(alphabet)
-    current = int(n)
-    if current < 0:
-        raise ValueError("invalid n (must be non-negative): %s", n)
-    while current:
-        result = alphabet[current % base] + result
-        current = current // base
-
-    return result
+    return _encode_number(n, alphabet, len(alphabet))
 
 
 def string_to_number(s, alphabet):
@@ -103,16 +158,126 @@ def string_to_number(s, alphabet):
     """
     base = len(alphabet)
     inverse_alphabet = dict(zip(alphabet, xrange(0, base)))
+    return _decode_number(s, inverse_alphabet, base)
+
+
+def _encode_number(n, alphabet, base):
+    n = int(n)
+    if n < 0:
+        raise ValueError("invalid n (must be non-negative): %s" % n)
+
+    digits = []
+    while n:
+        n, digit = divmod(n, base)
+        digits.append(alphabet[digit])
+
+    digits.reverse()
+    return ''.join(digits)
+
+
+def _decode_number(s, inverse_alphabet, base):
     n = 0
-    exp = 0
-    for i in reversed(s):
-        n += inverse_alphabet[i] * (base ** exp)
-        exp += 1
+    for ch in s:
+        n = n * base + inverse_alphabet[ch]
 
     return n
 
 
-def bytes_to_number(b, endian='big'):
+class Codec(object):
+    """
+    Precomputed ``alphabet`` mapping for converting many numbers to strings
+    and back, equivalent to ``number_to_string`` and ``string_to_number``.
+
+    Example::
+
+        >>> base62 = Codec(string.ascii_letters + string.digits)
+        >>> base62.encode(12345678)
+        'ZXP0'
+        >>> base62.decode('ZXP0')
+        12345678
+        >>> base62.encode_many([1, 62, 12345678])
+        ['b', 'ba', 'ZXP0']
+        >>> base62.decode_many(['b', 'ba', 'ZXP0'])
+        [1, 62, 12345678]
+        >>> base62.encode(62.5)
+        'ba'
+        >>> base62.encode_many([-1])
+        Traceback (most recent call last):
+        ...
+        ValueError: invalid n (must be non-negative): -1
+    """
+    def __init__(self, alphabet):
+        self.alphabet = alphabet
+        self.base = len(alphabet)
+        self._symbols = list(alphabet)
+        self._inverse_alphabet = dict(zip(alphabet, xrange(0, self.base)))
+
+    def encode(self, n):
+        return _encode_number(n, self._symbols, self.base)
+
+    def decode(self, s):
+        return _decode_number(s, self._inverse_alphabet, self.base)
+
+    def encode_many(self, numbers):
+        symbols, base = self._symbols, self.base
+        return [_encode_number(n, symbols, base) for n in numbers]
+
+    def decode_many(self, strings):
+        inverse_alphabet, base = self._inverse_alphabet, self.base
+        return [_decode_number(s, inverse_alphabet, base) for s in strings]
+
+    def __repr__(self):
+        return "%s(%r)" % (type(self).__name__, self.alphabet)
+
+
+if PY3:
+    def _int_from_bytes(b, endian, signed):
+        return int.from_bytes(b, endian, signed=signed)
+
+    def _int_to_bytes(n, length, endian, signed):
+        return n.to_bytes(length, endian, signed=signed)
+else:
+    def _int_from_bytes(b, endian, signed):
+        b = bytearray(b)
+        if endian == 'little':
+            b.reverse()
+        n = int(binascii.hexlify(b) or '0', 16)
+        if signed and b and b[0] & 0x80:
+            n -= 1 << (len(b) * 8)
+        return n
+
+    def _int_to_bytes(n, length, endian, signed):
+        if n < 0:
+            if not signed:
+                raise OverflowError("can't convert negative int to unsigned")
+            n += 1 << (length * 8)
+        b = binascii.unhexlify('%0*x' % (length * 2, n)) if length else ''
+        if len(b) > length or (n and not length):
+            raise OverflowError("int too big to convert")
+        if endian == 'little':
+            b = b[::-1]
+        return b
+
+
+def _byte_length(n, signed):
+    if signed:
+        return ((n if n >= 0 else ~n).bit_length() + 8) // 8
+    return (n.bit_length() + 7) // 8
+
+
+_STRUCT_FORMATS = {1: 'B', 2: 'H', 4: 'I', 8: 'Q'}
+_STRUCT_ENDIANS = {'big': '>', 'little': '<'}
+
+def _struct_format(count, length, endian, signed):
+    code = _STRUCT_FORMATS.get(length)
+    if code is None:
+        return
+    if signed:
+        code = code.lower()
+    return '%s%d%s' % (_STRUCT_ENDIANS[endian], count, code)
+
+
+def bytes_to_number(b, endian='big', signed=False):
     """
     Convert a string to an integer.
 
@@ -123,6 +288,9 @@ def bytes_to_number(b, endian='big'):
         Byte order to convert into ('big' or 'little' endian-ness, default
         'big')
 
+    :param signed:
+        Whether ``b`` is a two's complement signed value (default False).
+
     Assumes bytes are 8 bits.
 
     This is a special-case version of string_to_number with a full base-256
@@ -138,18 +306,13 @@ def bytes_to_number(b, endian='big'):
         256
         >>> bytes_to_number(b'\\x00\\x01', endian='little')
         256
+        >>> bytes_to_number(b'\\xff\\xfe', signed=True)
+        -2
     """
-    if endian == 'big':
-        b = reversed(b)
-
-    n = 0
-    for i, ch in enumerate(bytearray(b)):
-        n ^= ch << i * 8
-
-    return n
+    return _int_from_bytes(b, endian, signed)
 
 
-def number_to_bytes(n, endian='big'):
+def number_to_bytes(n, endian='big', length=None, signed=False):
     """
     Convert an integer to a corresponding string of bytes..
 
@@ -160,6 +323,15 @@ def number_to_bytes(n, endian='big'):
         Byte order to convert into ('big' or 'little' endian-ness, default
         'big')
 
+    :param length:
+        Number of bytes to produce, padding as needed. By default, the
+        shortest string which can represent ``n`` is returned. Raises
+        ``OverflowError`` if ``n`` does not fit.
+
+    :param signed:
+        Whether to use two's complement to represent negative values (default
+        False).
+
     Assumes bytes are 8 bits.
 
     This is a special-case version of number_to_string with a full base-256
@@ -175,22 +347,158 @@ def number_to_bytes(n, endian='big'):
         b'\\x01\\x00'
         >>> r(number_to_bytes(256, endian='little'))
         b'\\x00\\x01'
+        >>> r(number_to_bytes(42, length=4))
+        b'\\x00\\x00\\x00*'
+        >>> r(number_to_bytes(-2, signed=True))
+        b'\\xfe'
     """
-    res = []
-    while n:
-        n, ch = divmod(n, 256)
-        if PY3:
-            res.append(ch)
-        else:
-            res.append(chr(ch))
+    if length is None:
+        length = _byte_length(n, signed)
+    return _int_to_bytes(n, length, endian, signed)
+
+
+def number_to_bytes_many(numbers, length, endian='big', signed=False):
+    """
+    Pack a sequence of integers into a single string of ``length`` bytes per
+    integer. Same arguments as ``number_to_bytes``, except that ``length`` is
+    required. It is the reverse of ``bytes_to_number_many(b, length)``.
+
+    Example::
+
+        >>> r(number_to_bytes_many([1, 2, 256], length=2))
+        b'\\x00\\x01\\x00\\x02\\x01\\x00'
+        >>> r(number_to_bytes_many([1, 2], length=3, endian='little'))
+        b'\\x01\\x00\\x00\\x02\\x00\\x00'
+    """
+    numbers = list(numbers)
+    fmt = _struct_format(len(numbers), length, endian, signed)
+    if fmt:
+        try:
+            return struct.pack(fmt, *numbers)
+        except struct.error as e:
+            raise OverflowError(str(e))
+
+    return b''.join([_int_to_bytes(n, length, endian, signed) for n in numbers])
+
+
+def bytes_to_number_many(b, length, endian='big', signed=False):
+    """
+    Unpack a string of bytes into a list of integers of ``length`` bytes each.
+    Same arguments as ``bytes_to_number``, except that ``length`` is required.
+    Accepts anything which supports the buffer protocol, such as a
+    ``memoryview``, without copying.
+
+    Example::
+
+        >>> bytes_to_number_many(b'\\x00\\x01\\x00\\x02\\x01\\x00', length=2)
+        [1, 2, 256]
+        >>> bytes_to_number_many(b'\\x01\\x00\\x00\\x02\\x00\\x00', length=3, endian='little')
+        [1, 2]
+    """
+    size = len(b)
+    if size % length:
+        raise ValueError("Length of b must be a multiple of length: %d" % length)
+
+    fmt = _struct_format(size // length, length, endian, signed)
+    if fmt:
+        return list(struct.unpack_from(fmt, b))
+
+    view = memoryview(b)
+    return [
+        _int_from_bytes(view[i:i + length], endian, signed)
+        for i in xrange(0, size, length)
+    ]
 
-    if endian == 'big':
-        res.reverse()
 
-    if PY3:
-        return bytes(res)
+def _encode_binary(obj, encoding, **encode_args):
+    return obj
+
+def _encode_text(obj, encoding, **encode_args):
+    # Note: unicode(u'foo') is O(1) (by experimentation)
+    return text_type(obj).encode(encoding, **encode_args)
+
+def _encode_other(obj, encoding, **encode_args):
+    return binary_type(obj)
+
+
+def _decode_binary(obj, encoding, fallback, **decode_args):
+    try:
+        return text_type(obj, encoding, **decode_args)
+    except UnicodeDecodeError:
+        return text_type(obj, fallback, **decode_args)
+
+def _decode_text(obj, encoding, fallback, **decode_args):
+    return text_type(obj)
+
+def _decode_other(obj, encoding, fallback, **decode_args):
+    return _decode_binary(binary_type(obj), encoding, fallback, **decode_args)
+
+
+# Converters for ``to_str`` and ``to_unicode``, by the exact type of the
+# object being converted. Filled in as new types are seen. Exact ``str`` and
+# ``unicode`` objects are handled inline before these are consulted.
+#
+# These hold strong references to the types, so that classes created on the
+# fly (namedtuples, per-request proxies) don't accumulate forever, at most
+# ``_MAX_CACHED_CONVERTERS`` types are cached; after that, new types are
+# resolved on every call. A WeakKeyDictionary would avoid the cap, but its
+# lookups are about 4x slower than a dict's, which is most of the cost of a
+# cached conversion.
+_MAX_CACHED_CONVERTERS = 1024
+_STR_CONVERTERS = {}
+_UNICODE_CONVERTERS = {binary_type: _decode_binary}
+
+def _resolve_converter(obj, converters, binary, text, other):
+    # Note: On py3, ``b'x'.__str__()`` returns ``"b'x'"``, so we need to do the
+    # explicit check first.
+    if isinstance(obj, binary_type):
+        converter = binary
+    # We coerce to unicode if '__unicode__' is available because there is no
+    # way to specify encoding when calling ``str(obj)``, so, eg,
+    # ``str(Exception(u'\u1234'))`` will explode.
+    elif isinstance(obj, text_type) or hasattr(obj, text_type_magicmethod):
+        converter = text
     else:
-        return ''.join(res)
+        converter = other
+
+    # Old-style class instances on py2 all share a type, so they can't be
+    # cached by it.
+    if type(obj) is getattr(obj, '__class__', None) and len(converters) < _MAX_CACHED_CONVERTERS:
+        converters[type(obj)] = converter
+    return converter
+
+
+def register_converter(cls, to_str=None, to_unicode=None):
+    r"""
+    Register custom converters for objects of exactly type ``cls``, used by
+    ``to_str`` and ``to_unicode`` instead of the default behaviour. The
+    builtin ``str`` and ``unicode`` types can't be overridden.
+
+    :param to_str:
+        Callable with the same signature as ``to_str``, which returns a
+        ``str`` of ``obj``.
+
+    :param to_unicode:
+        Callable with the same signature as ``to_unicode``, except that
+        ``fallback`` is always passed, which returns a ``unicode`` of ``obj``.
+
+    Example::
+
+        >>> class Point(object):
+        ...     def __init__(self, x, y):
+        ...         self.x, self.y = x, y
+        >>> register_converter(Point,
+        ...     to_str=lambda p, encoding, **kw: b'%d,%d' % (p.x, p.y),
+        ...     to_unicode=lambda p, encoding, fallback, **kw: u'%d,%d' % (p.x, p.y))
+        >>> r(to_str(Point(1, 2)))
+        b'1,2'
+        >>> r(to_unicode(Point(1, 2)))
+        u'1,2'
+    """
+    if to_str is not None:
+        _STR_CONVERTERS[cls] = to_str
+    if to_unicode is not None:
+        _UNICODE_CONVERTERS[cls] = to_unicode
 
 
 def to_str(obj, encoding='utf-8', **encode_args):
@@ -210,21 +518,27 @@ def to_str(obj, encoding='utf-8', **encode_args):
         >>> r(to_str([42]))
         b'[42]'
 
+    The conversion strategy is cached by the type of ``obj``, see
+    ``register_converter`` to add custom ones.
+
     See source code for detailed semantics.
     """
-    # Note: On py3, ``b'x'.__str__()`` returns ``"b'x'"``, so we need to do the
-    # explicit check first.
-    if isinstance(obj, binary_type):
+    cls = type(obj)
+    if cls is text_type:
+        return obj.encode(encoding, **encode_args)
+    if cls is binary_type:
         return obj
 
-    # We coerce to unicode if '__unicode__' is available because there is no
-    # way to specify encoding when calling ``str(obj)``, so, eg,
-    # ``str(Exception(u'\u1234'))`` will explode.
-    if isinstance(obj, text_type) or hasattr(obj, text_type_magicmethod):
-        # Note: unicode(u'foo') is O(1) (by experimentation)
+    try:
+        converter = _STR_CONVERTERS[cls]
+    except KeyError:
+        converter = _resolve_converter(
+            obj, _STR_CONVERTERS, _encode_binary, _encode_text, _encode_other,
+        )
+    if converter is _encode_text:
+        # Inlined, as this is by far the most common strategy.
         return text_type(obj).encode(encoding, **encode_args)
-
-    return binary_type(obj)
+    return converter(obj, encoding, **encode_args)
 
 
 def to_unicode(obj, encoding='utf-8', fallback='latin1', **decode_args):
@@ -245,23 +559,70 @@ def to_unicode(obj, encoding='utf-8', fallback='latin1', **decode_args):
         >>> r(to_unicode([42]))
         u'[42]'
 
+    The conversion strategy is cached by the type of ``obj``, see
+    ``register_converter`` to add custom ones.
+
     See source code for detailed semantics.
     """
+    cls = type(obj)
+    if cls is text_type:
+        return obj
 
-    # Note: on py3, the `bytes` type defines an unhelpful "__str__" function,
-    # so we need to do this check (see comments in ``to_str``).
-    if not isinstance(obj, binary_type):
-        if isinstance(obj, text_type) or hasattr(obj, text_type_magicmethod):
-            return text_type(obj)
+    try:
+        converter = _UNICODE_CONVERTERS[cls]
+    except KeyError:
+        converter = _resolve_converter(
+            obj, _UNICODE_CONVERTERS, _decode_binary, _decode_text, _decode_other,
+        )
+    if converter is _decode_text:
+        # Inlined, as this is by far the most common strategy.
+        return text_type(obj)
+    return converter(obj, encoding, fallback, **decode_args)
+
+
+def _fallback_errors(fallback):
+    """
+    Return the name of a codec error handler which decodes the offending
+    bytes using the ``fallback`` encoding, registering it if necessary.
+    """
+    name = 'unstdlib.fallback.%s' % fallback
+    try:
+        codecs.lookup_error(name)
+    except LookupError:
+        def fallback_handler(e):
+            return e.object[e.start:e.end].decode(fallback), e.end
+        codecs.register_error(name, fallback_handler)
+    return name
 
-        obj_str = binary_type(obj)
-    else:
-        obj_str = obj
 
-    try:
-        return text_type(obj_str, encoding, **decode_args)
-    except UnicodeDecodeError:
-        return text_type(obj_str, fallback, **decode_args)
+def iterate_unicode(chunks, encoding='utf-8', fallback='latin1', chunk_size=65536):
+    r"""
+    Incrementally decode ``chunks`` of bytes, yielding ``unicode`` chunks.
+    Unlike ``to_unicode``, only the bytes which fail to decode with
+    ``encoding`` are decoded using the ``fallback`` encoding.
+
+    :param chunks:
+        Iterable of byte strings, or a file-like object opened in binary mode
+        which will be read ``chunk_size`` bytes at a time.
+
+    Example::
+
+        >>> [r(s) for s in iterate_unicode([b'\xe1\x88', b'\xb4 \xff!'])]
+        [u'', u'\u1234 \xff!']
+        >>> import io
+        >>> r(u''.join(iterate_unicode(io.BytesIO(b'caf\xc3\xa9'), chunk_size=4)))
+        u'caf\xe9'
+    """
+    if hasattr(chunks, 'read'):
+        chunks = iter(partial(chunks.read, chunk_size), b'')
+
+    decoder = codecs.getincrementaldecoder(encoding)(_fallback_errors(fallback))
+    for chunk in chunks:
+        yield decoder.decode(chunk)
+
+    tail = decoder.decode(b'', True)
+    if tail:
+        yield tail
 
 
 def to_int(s, default=0):
@@ -329,6 +690,80 @@ def to_float(s, default=0.0, allow_nan=False):
     return f
 
 
+def to_int_many(values, default=0, typecode='l'):
+    """
+    Return an ``array.array`` of ``values`` converted into integers, same as
+    ``to_int`` for each of them. ``default`` must fit in an array of the
+    given ``typecode``.
+
+    Examples::
+
+        >>> to_int_many(['1', '2', '3'])
+        array('l', [1, 2, 3])
+        >>> to_int_many(['1', '', None, 'x', 4.0], default=-1)
+        array('l', [1, -1, -1, -1, 4])
+        >>> def corrupt():
+        ...     yield '1'
+        ...     raise ValueError('corrupt input stream')
+        >>> to_int_many(corrupt())
+        Traceback (most recent call last):
+        ...
+        ValueError: corrupt input stream
+    """
+    # Materialize ``values`` first, so that errors raised by the input itself
+    # propagate rather than being mistaken for bad values below.
+    if not isinstance(values, (list, tuple)):
+        values = list(values)
+
+    # Convert everything in one pass, and on a bad value append ``default``
+    # and resume from the value after it. array.extend keeps the values
+    # appended before the failure, and map has already consumed the bad one.
+    r = array(typecode)
+    values = iter(values)
+    while True:
+        try:
+            r.extend(map(int, values))
+            return r
+        except (TypeError, ValueError):
+            r.append(default)
+
+
+def to_float_many(values, default=0.0, allow_nan=False, typecode='d'):
+    """
+    Return an ``array.array`` of ``values`` converted into floats, same as
+    ``to_float`` for each of them. ``default`` must fit in an array of the
+    given ``typecode``.
+
+    Examples::
+
+        >>> to_float_many(['1.5', 2, '3'])
+        array('d', [1.5, 2.0, 3.0])
+        >>> to_float_many(['1.5', '', 'nan', 'inf', None])
+        array('d', [1.5, 0.0, 0.0, 0.0, 0.0])
+        >>> to_float_many(['1.5', '-inf'], allow_nan=True)
+        array('d', [1.5, -inf])
+    """
+    # Same approach as to_int_many, then replace any nan and inf afterwards.
+    if not isinstance(values, (list, tuple)):
+        values = list(values)
+
+    r = array(typecode)
+    values = iter(values)
+    while True:
+        try:
+            r.extend(map(float, values))
+            break
+        except (TypeError, ValueError):
+            r.append(default)
+
+    if not allow_nan and (any(map(math.isnan, r)) or any(map(math.isinf, r))):
+        for i, f in enumerate(r):
+            if math.isnan(f) or math.isinf(f):
+                r[i] = default
+
+    return r
+
+
 def format_int(n, singular=_Default, plural=_Default):
     """
     Return `singular.format(n)` if n is 1, or `plural.format(n)` otherwise. If
@@ -378,13 +813,61 @@ def format_int(n, singular=_Default, plural=_Default):
 
 RE_NUMBER = re.compile(r'[\d\.\-eE]+')
 
+def _decimal_to_cents(d):
+    # Shift by two decimal places and round half-to-even using integer
+    # arithmetic, so that precision isn't limited by the decimal context.
+    sign, digits, exponent = d.as_tuple()
+    if not isinstance(exponent, integer_types):
+        raise ValueError("Invalid amount: %s" % d)
+    if d.adjusted() > 308:
+        # Same limit as the float range, rather than building a giant integer.
+        raise OverflowError("Amount too large: %s" % d)
+    if d.adjusted() < -3:
+        # Less than a tenth of a cent rounds to zero; don't build a giant
+        # divisor for tiny exponents.
+        return 0
+
+    n = 0
+    for digit in digits:
+        n = n * 10 + digit
+
+    exponent += 2
+    if exponent >= 0:
+        n *= 10 ** exponent
+    else:
+        n, remainder = divmod(n, 10 ** -exponent)
+        half = 5 * 10 ** (-exponent - 1)
+        if remainder > half or (remainder == half and n % 2):
+            n += 1
+
+    return -n if sign else n
+
+
+def _string_to_cents(s):
+    # Up to 15 significant digits with at most two decimal places are exact
+    # enough as a float to land on the right number of cents, which is much
+    # faster than going through Decimal.
+    dot = s.find('.')
+    if len(s) <= 15 and (dot < 0 or len(s) - dot <= 3) and 'e' not in s and 'E' not in s:
+        try:
+            return int(round(float(s) * 100))
+        except ValueError:
+            pass
+
+    try:
+        return _decimal_to_cents(Decimal(s))
+    except InvalidOperation:
+        raise ValueError("Invalid amount: %s" % s)
+
+
 def dollars_to_cents(s, allow_negative=False):
     """
     Given a string or integer representing dollars, return an integer of
     equivalent cents, in an input-resilient way.
     
     This works by stripping any non-numeric characters before attempting to
-    cast the value.
+    cast the value. Amounts are converted exactly, even beyond the precision
+    of a float, and fractions of a cent are rounded half-to-even.
 
     Examples::
 
@@ -396,33 +879,150 @@ def dollars_to_cents(s, allow_negative=False):
         100
         >>> dollars_to_cents('1e2')
         10000
+        >>> dollars_to_cents('1e-999999999')
+        0
         >>> dollars_to_cents('-1$', allow_negative=True)
         -100
         >>> dollars_to_cents('1 dollar')
         100
+        >>> dollars_to_cents('$90071992547409.93')
+        9007199254740993
     """
-    # TODO: Implement cents_to_dollars
     if not s:
         return
 
-    if isinstance(s, string_types):
-        s = ''.join(RE_NUMBER.findall(s))
+    if isinstance(s, integer_types):
+        dollars = int(s) * 100
+    elif isinstance(s, string_types):
+        dollars = _string_to_cents(''.join(RE_NUMBER.findall(s)))
+    elif isinstance(s, Decimal):
+        dollars = _decimal_to_cents(s)
+    else:
+        dollars = _string_to_cents(repr(float(s)))
 
-    dollars = int(round(float(s) * 100))
     if not allow_negative and dollars < 0:
         raise ValueError('Negative values not permitted.')
 
     return dollars
 
 
+def dollars_to_cents_many(values, allow_negative=False):
+    """
+    Iterate over ``values``, yielding ``dollars_to_cents(value, allow_negative)``
+    for each.
+
+    Example::
+
+        >>> list(dollars_to_cents_many(['$1.50', '', '2']))
+        [150, None, 200]
+    """
+    for s in values:
+        yield dollars_to_cents(s, allow_negative)
+
+
+def cents_to_dollars(cents):
+    """
+    Given an integer of cents, return a string of the equivalent dollars. It
+    is the reverse of ``dollars_to_cents(s)``.
+
+    Examples::
+
+        >>> cents_to_dollars(150)
+        '1.50'
+        >>> cents_to_dollars(-5)
+        '-0.05'
+        >>> dollars_to_cents(cents_to_dollars(9007199254740993))
+        9007199254740993
+    """
+    cents = int(cents)
+    dollars, remainder = divmod(abs(cents), 100)
+    return '%s%d.%02d' % ('-' if cents < 0 else '', dollars, remainder)
+
+
+def cents_to_dollars_many(values):
+    """
+    Iterate over ``values``, yielding ``cents_to_dollars(value)`` for each.
+
+    Example::
+
+        >>> list(cents_to_dollars_many([150, 2]))
+        ['1.50', '0.02']
+    """
+    for cents in values:
+        yield cents_to_dollars(cents)
+
+
 RE_SLUG = re.compile(r'\W+')
 
+# Maps ASCII word characters (same as ``RE_SLUG``) to lowercase and everything
+# else to whitespace, for use with ``bytes.translate``.
+_SLUG_TABLE = bytes(bytearray(
+    ord(chr(i).lower()) if i < 128 and RE_SLUG.match(chr(i)) is None else ord(' ')
+    for i in xrange(256)
+))
+
 def slugify(s, delimiter='-'):
     """
     Normalize `s` into ASCII and replace non-word characters with `delimiter`.
+
+    Accented characters are reduced to their base letter using NFKD
+    decomposition. Characters which don't decompose into ASCII (like the
+    German sharp s, the ae ligature, or l with stroke) are dropped rather than
+    transliterated.
+
+    Example::
+
+        >>> r(slugify('Hello, World!'))
+        u'hello-world'
+        >>> r(slugify(u'Caf\xe9 cr\xe8me'))
+        u'cafe-creme'
+        >>> r(slugify(u'Stra\xdfe'))
+        u'strae'
+    """
+    s = to_unicode(s)
+    try:
+        b = s.encode('ascii')
+    except UnicodeEncodeError:
+        b = unicodedata.normalize('NFKD', s).encode('ascii', 'ignore')
+    s = b.translate(_SLUG_TABLE).decode('ascii')
+    return delimiter.join(s.split()).strip(delimiter)
+
+
+def slugify_many(strings, delimiter='-', cache=None):
+    """
+    Return a list of ``slugify(s, delimiter)`` for each of ``strings``.
+
+    :param cache:
+        Optional dict-like container used to memoize slugs by input string,
+        which can be shared between calls. Use a
+        ``unstdlib.standard.collections_.RecentlyUsedContainer`` to keep it
+        bounded.
+
+    Example::
+
+        >>> cache = {}
+        >>> [r(slug) for slug in slugify_many(['Hi!', u'Caf\xe9', 'Hi!'], cache=cache)]
+        [u'hi', u'cafe', u'hi']
+        >>> len(cache)
+        2
+        >>> from unstdlib.standard.collections_ import RecentlyUsedContainer
+        >>> cache = RecentlyUsedContainer(maxsize=1)
+        >>> [r(slug) for slug in slugify_many(['Hi!', u'Caf\xe9', 'Hi!'], cache=cache)]
+        [u'hi', u'cafe', u'hi']
+        >>> len(cache)
+        1
     """
-    s = unicodedata.normalize('NFKD', to_unicode(s)).encode('ascii', 'ignore').decode('ascii')
-    return RE_SLUG.sub(delimiter, s).strip(delimiter).lower()
+    if cache is None:
+        return [slugify(s, delimiter) for s in strings]
+
+    r = []
+    for s in strings:
+        try:
+            slug = cache[s]
+        except KeyError:
+            slug = cache[s] = slugify(s, delimiter)
+        r.append(slug)
+    return r
 
 
 if __name__ == "__main__":